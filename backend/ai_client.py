@@ -0,0 +1,180 @@
+# ai_client.py
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+MODEL = "mistralai/mistral-7b-instruct"
+# Connection setup is bounded tightly; `read` bounds the gap between two streamed chunks.
+DEFAULT_TIMEOUT = httpx.Timeout(connect=5.0, read=30.0, write=10.0, pool=5.0)
+# Upper bound on one whole upstream completion, however steadily it trickles in.
+DEFAULT_TOTAL_TIMEOUT = 60.0
+DEFAULT_CACHE_TTL = 3600.0
+DEFAULT_CACHE_ENTRIES = 1024
+
+
+def fingerprint(subject, model: str = MODEL) -> str:
+    # Cache key for a suggestion: a hash of the model and what the prompt describes.
+    return hashlib.blake2b(json.dumps([model, subject]).encode(), digest_size=20).hexdigest()
+
+
+class _Flight:
+    # This class defines the structure and logic for _Flight
+    """
+    Flight: One upstream completion in progress. Chunks are appended as they arrive and every
+    waiting reader is woken, so late joiners replay what was already received and then follow live.
+    """
+    def __init__(self):
+        # Initializes the class instance with necessary attributes.
+        self.chunks: List[str] = []
+        self.done = False
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def append(self, chunk: str):
+        # Publishes a chunk to all readers.
+        self.chunks.append(chunk)
+        self._wake()
+
+    def finish(self):
+        # Marks the completion as over (successful or not).
+        self.done = True
+        self._wake()
+
+    def _wake(self):
+        # Releases the current waiters and arms a fresh event for the next change.
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    async def follow(self) -> AsyncIterator[str]:
+        # Yields every chunk from the first one until the flight finishes.
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                return
+            await self.changed.wait()
+
+
+class SuggestionClient:
+    # This class defines the structure and logic for SuggestionClient
+    """
+    Suggestion Client: Streams sorting suggestions from an OpenRouter-compatible chat endpoint over
+    one pooled httpx.AsyncClient that lives as long as the app (start() / close() in the lifespan).
+    Completed suggestions are cached per subject fingerprint for `cache_ttl` seconds and replayed as a
+    single chunk; concurrent requests for the same array share one upstream stream.
+    """
+    def __init__(self, url: str = OPENROUTER_URL, timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+                 total_timeout: float = DEFAULT_TOTAL_TIMEOUT, cache_ttl: float = DEFAULT_CACHE_TTL,
+                 cache_entries: int = DEFAULT_CACHE_ENTRIES):
+        # Initializes the class instance with necessary attributes.
+        self.url = url
+        self.timeout = timeout
+        self.total_timeout = total_timeout
+        self.cache_ttl = cache_ttl
+        self.cache_entries = cache_entries
+        self.client: Optional[httpx.AsyncClient] = None
+        self.cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self.flights: Dict[str, _Flight] = {}
+        self.upstream_requests = 0
+        self.cache_hits = 0
+
+    async def start(self):
+        # Opens the pooled HTTP client.
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+
+    async def close(self):
+        # Closes the pooled HTTP client and its connections.
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def cached(self, key: str) -> Optional[str]:
+        # Returns the cached suggestion text for key, dropping it once its TTL has passed.
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        expires, text = entry
+        if expires <= time.monotonic():
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        return text
+
+    def remember(self, key: str, text: str):
+        # Stores a completed suggestion, evicting the least recently used past cache_entries.
+        self.cache[key] = (time.monotonic() + self.cache_ttl, text)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_entries:
+            self.cache.popitem(last=False)
+
+    async def suggest(self, subject, prompt: str, api_key: str) -> AsyncIterator[str]:
+        # Streams the suggestion for subject (the array, or the feature summary the prompt is built
+        # from): from the cache, from an identical request already in flight, or from a new upstream request.
+        key = fingerprint(subject)
+        text = self.cached(key)
+        if text is not None:
+            self.cache_hits += 1
+            yield text
+            return
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = self.flights[key] = _Flight()
+            # The upstream request runs as its own task, so the other readers keep streaming
+            # even if the client that started it disconnects.
+            flight.task = asyncio.create_task(self._fetch(key, flight, prompt, api_key))
+        async for chunk in flight.follow():
+            yield chunk
+
+    async def _fetch(self, key: str, flight: _Flight, prompt: str, api_key: str):
+        # Runs one upstream completion into flight and caches it if it finished cleanly.
+        self.upstream_requests += 1
+        ok = False
+        try:
+            ok = await asyncio.wait_for(self._stream_upstream(flight, prompt, api_key), self.total_timeout)
+        except asyncio.TimeoutError:
+            flight.append(f"[Error]: OpenRouter API did not finish within {self.total_timeout:g}s")
+        except Exception as e:
+            flight.append(f"[Error]: Exception during streaming response: {str(e)}")
+        finally:
+            if ok:
+                self.remember(key, "".join(flight.chunks))
+            self.flights.pop(key, None)
+            flight.finish()
+
+    async def _stream_upstream(self, flight: _Flight, prompt: str, api_key: str) -> bool:
+        # Forwards the upstream event stream into flight; returns False on a non-200 status.
+        await self.start()
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        }
+        payload = {
+            "model": MODEL,
+            "temperature": 0.0,
+            "max_tokens": 300,
+            "messages": [
+                {"role": "system", "content": "You are a helpful assistant and sorting algorithm expert."},
+                {"role": "user", "content": prompt},
+            ],
+            "stream": True,
+        }
+        async with self.client.stream("POST", self.url, headers=headers, json=payload) as response:
+            if response.status_code != 200:
+                text = await response.aread()
+                flight.append(f"[Error]: OpenRouter API returned status {response.status_code} - {text.decode()}")
+                return False
+            async for chunk in response.aiter_text():
+                flight.append(chunk)
+        return True
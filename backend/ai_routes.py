@@ -1,32 +1,64 @@
 # ai_routes.py
 import os
 import json
-import httpx
 from fastapi import APIRouter, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse, JSONResponse
 
+from ai_client import OPENROUTER_URL, SuggestionClient
+from algorithms.recommender import analyze, summary
+from algorithms.sort_manager import SortManager
+from ingest import read_array
+
 router = APIRouter()
 
+# Shared upstream client: pooled connections, bounded timeouts, suggestion cache and coalescing.
+# Opened and closed by the app lifespan in main.py; OPENROUTER_URL can point at a local stub.
+suggestion_client = SuggestionClient(
+    url=os.getenv("OPENROUTER_URL", OPENROUTER_URL),
+    cache_ttl=float(os.getenv("AI_CACHE_TTL", "3600")),
+)
+
+# Local recommender; SORT_CALIBRATION_PATH may name a benchmark.py report to calibrate it with.
+recommender_manager = SortManager()
+if os.getenv("SORT_CALIBRATION_PATH"):
+    with open(os.environ["SORT_CALIBRATION_PATH"]) as f:
+        recommender_manager.calibrate(json.load(f))
+
+async def local_suggestion(recommendation):
+    # Emits a recommender result in the same SSE chunk shape as the model stream.
+    text = f"Use {recommendation['algorithm']}: {recommendation['reason']}."
+    yield f"data: {json.dumps({'choices': [{'delta': {'content': text}}], 'recommendation': recommendation})}\n\n"
+    yield "data: [DONE]\n\n"
+
 @router.post("/ai-suggest")
 async def ai_suggest(request: Request):
     try:
-        data = await request.json()
-        array = data.get("array")
-
-        # Validate input
-        if not isinstance(array, list) or not all(isinstance(i, (int, float)) for i in array):
-            return JSONResponse(status_code=400, content={
-                "error": "Invalid input: 'array' must be a list of numbers."
-            })
+        # Decoded and type-checked in one pass (ingest.py); raw int64 bodies take `mode` from the query.
+        try:
+            array, data = await read_array(request, allow_float=True)
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"error": f"Invalid input: {e}"})
+        mode = data.get("mode", request.query_params.get("mode"))
 
         if len(array) == 0:
             return JSONResponse(status_code=400, content={
                 "error": "Input array is empty. Provide a non-empty list of numbers."
             })
 
+        # Fast mode answers from the local recommender without calling the model. The measures take
+        # several pure-Python passes over the array, so they run in the threadpool.
+        features = await run_in_threadpool(analyze, array)
+        if mode == "fast":
+            recommendation = await run_in_threadpool(recommender_manager.recommend, array, features)
+            return StreamingResponse(local_suggestion(recommendation), media_type="text/event-stream")
+
+        # Only a compact summary of the array is sent, so the prompt size does not grow with the input.
+        feature_summary = summary(features)
+        candidates = ", ".join(recommender_manager.recommendable())
         prompt = (
-            f"Given the array: {array}, suggest the best sorting algorithm "
-            "from bubble sort, merge sort, insertion sort, and quick sort. "
+            f"An array has these properties: {feature_summary}. "
+            f"Suggest the best sorting algorithm from: {candidates}. "
             "Explain why in 30 words in simple terms."
         )
 
@@ -36,44 +68,8 @@ async def ai_suggest(request: Request):
                 "error": "Missing OpenRouter API key. Set OPENROUTER_API_KEY in the environment."
             })
 
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        }
-
-        payload = {
-            "model": "mistralai/mistral-7b-instruct",
-            "temperature": 0.0,
-            "max_tokens": 300,
-            "messages": [
-                {"role": "system", "content": "You are a helpful assistant and sorting algorithm expert."},
-                {"role": "user", "content": prompt},
-            ],
-            "stream": True,
-        }
-
-        async def stream():
-            try:
-                async with httpx.AsyncClient(timeout=None) as client:
-                    async with client.stream(
-                        "POST",
-                        "https://openrouter.ai/api/v1/chat/completions",
-                        headers=headers,
-                        json=payload
-                    ) as response:
-                        if response.status_code != 200:
-                            text = await response.aread()
-                            yield f"[Error]: OpenRouter API returned status {response.status_code} - {text.decode()}"
-                            return
-                        async for chunk in response.aiter_text():
-                            yield chunk
-            except Exception as e:
-                yield f"[Error]: Exception during streaming response: {str(e)}"
-
-        return StreamingResponse(stream(), media_type="text/event-stream")
+        return StreamingResponse(suggestion_client.suggest(feature_summary, prompt, api_key), media_type="text/event-stream")
 
-    except json.JSONDecodeError:
-        return JSONResponse(status_code=400, content={"error": "Invalid JSON body in request."})
     except Exception as e:
         return JSONResponse(status_code=500, content={
             "error": f"Unexpected server error: {str(e)}"
@@ -1,9 +1,147 @@
-from typing import List, Dict
+from typing import List, Dict, Iterator, Generator, Optional, Tuple
 from abc import ABC, abstractmethod
+from array import array
+from .trace import TraceRecorder, TraceSampler, TraceOptions
+import time
+
+def drain(run: Generator) -> Tuple[List[int], Dict]:
+    # Runs a generate() generator to the end, discarding its steps; returns its (sorted array, counters).
+    while True:
+        try:
+            next(run)
+        except StopIteration as stop:
+            return stop.value
+
+def as_list(arr) -> List[int]:
+    # The values of an ingested int64 buffer (array('q')) as a list; lists pass through unchanged.
+    return arr.tolist() if isinstance(arr, array) else arr
+
+class SortHook:
+    # This class defines the structure and logic for SortHook
+    """
+    Sort Hook: Instrumentation called around every SortingAlgorithm.sort(). after_sort() always
+    runs, even when the sort raised (result is then None). `phases` holds seconds spent in
+    'compute' (the algorithm) and, for traced runs, 'trace' (building step dicts).
+    """
+    def before_sort(self, algorithm: 'SortingAlgorithm', size: int, trace: bool):
+        # Called before the sort starts.
+        pass
+
+    def after_sort(self, algorithm: 'SortingAlgorithm', size: int, trace: bool, result: Optional[Dict], phases: Dict):
+        # Called once the sort finished or failed.
+        pass
 
 class SortingAlgorithm(ABC):
     # This class defines the structure and logic for SortingAlgorithm
+    # Hooks registered with add_hook() apply to every algorithm; `name` is set by SortManager.
+    # Engines with `accepts_buffer` take an array('q') in sort_untraced() as is; the others get a list.
+    hooks: List[SortHook] = []
+    name: Optional[str] = None
+    accepts_buffer = False
+
+    @staticmethod
+    def add_hook(hook: SortHook):
+        # Registers an instrumentation hook for all algorithms.
+        SortingAlgorithm.hooks.append(hook)
+
+    @staticmethod
+    def remove_hook(hook: SortHook):
+        # Unregisters a hook added with add_hook().
+        SortingAlgorithm.hooks.remove(hook)
+
     @abstractmethod
-    def sort(self, arr: List[int]) -> Dict:
-        # Executes the sorting algorithm and tracks steps for visualization.
-        pass
\ No newline at end of file
+    def generate(self, arr: List[int]) -> Generator[Dict, None, Tuple[List[int], Dict]]:
+        # Sorts the array while lazily yielding raw steps; returns (sorted array, counters) when done.
+        pass
+
+    def iter_steps(self, arr: List[int], trace_format: str = 'delta', phases: Optional[Dict] = None,
+                   options: Optional[TraceOptions] = None) -> Iterator[Dict]:
+        # Yields recorded steps one at a time, then a final 'done' step with the sorted array and metrics.
+        # When `phases` is given, it receives the seconds spent computing vs recording steps.
+        # With non-default `options` the steps go through a TraceSampler and the 'done' step also
+        # carries a 'trace' summary; once a kept step past the requested window turns up, the rest of
+        # the sort runs without recording.
+        arr = as_list(arr)
+        recorder = TraceRecorder(arr, trace_format)
+        sampler = TraceSampler(arr, trace_format, options) if options and not options.is_default() else None
+        run = self.generate(arr)
+        elapsed = 0.0
+        recording = 0.0
+        while True:
+            start_time = time.perf_counter()
+            try:
+                step = next(run)
+            except StopIteration as stop:
+                elapsed += time.perf_counter() - start_time
+                sorted_arr, counters = stop.value
+                break
+            recorded_time = time.perf_counter()
+            elapsed += recorded_time - start_time
+            step = recorder.record(step)
+            if sampler is None:
+                recording += time.perf_counter() - recorded_time
+                yield step
+                continue
+            out = sampler.push(step)
+            recording += time.perf_counter() - recorded_time
+            yield from out
+            if sampler.full:
+                start_time = time.perf_counter()
+                sorted_arr, counters = drain(run)
+                elapsed += time.perf_counter() - start_time
+                break
+        done = {'type': 'done', 'sorted': sorted_arr}
+        if sampler is not None:
+            yield from sampler.finish()
+            done['trace'] = sampler.summary(complete=not sampler.full)
+        if phases is not None:
+            phases.update({'compute': elapsed, 'trace': recording})
+        done['metrics'] = {**counters, 'time': round(elapsed, 6)}
+        yield done
+
+    def sort_untraced(self, arr: List[int]) -> Tuple[List[int], Dict]:
+        # Sorts without recording steps; returns (sorted array, counters). Subclasses override this
+        # with a tight loop that never builds step dicts, this fallback just drains generate().
+        return drain(self.generate(arr))
+
+    def sort(self, arr: List[int], trace_format: str = 'delta', trace: bool = True,
+             options: Optional[TraceOptions] = None) -> Dict:
+        # Executes the sorting algorithm and tracks steps for visualization, running the hooks around it.
+        if not self.hooks:
+            return self.run(arr, trace_format, trace, {}, options)
+        size = len(arr)
+        for hook in self.hooks:
+            hook.before_sort(self, size, trace)
+        phases, result = {}, None
+        try:
+            result = self.run(arr, trace_format, trace, phases, options)
+            return result
+        finally:
+            for hook in self.hooks:
+                hook.after_sort(self, size, trace, result, phases)
+
+    def run(self, arr: List[int], trace_format: str, trace: bool, phases: Dict,
+            options: Optional[TraceOptions] = None) -> Dict:
+        # sort() without the hooks; fills `phases` with the timings. Sampled traces add a 'trace' summary.
+        if not trace:
+            if not self.accepts_buffer:
+                arr = as_list(arr)
+            start_time = time.perf_counter()
+            sorted_arr, counters = self.sort_untraced(arr)
+            end_time = time.perf_counter()
+            phases['compute'] = end_time - start_time
+            return {
+                'steps': [],
+                'sorted': sorted_arr,
+                'metrics': {**counters, 'time': round(end_time - start_time, 6)}
+            }
+        steps = list(self.iter_steps(arr, trace_format, phases, options))
+        done = steps.pop()
+        result = {
+            'steps': steps,
+            'sorted': done['sorted'],
+            'metrics': done['metrics']
+        }
+        if 'trace' in done:
+            result['trace'] = done['trace']
+        return result
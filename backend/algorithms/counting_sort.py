@@ -0,0 +1,58 @@
+from typing import List, Dict, Generator, Tuple
+from .base import SortingAlgorithm
+
+MAX_KEY_RANGE = 1 << 20
+
+def key_range(arr: List[int], max_range: int = MAX_KEY_RANGE) -> Tuple[int, int]:
+    # Detects (min, max) of the keys, rejecting ranges too wide to hold one counter per key.
+    lo, hi = min(arr), max(arr)
+    if hi - lo + 1 > max_range:
+        raise ValueError(f"Key range {lo}..{hi} is too wide for counting sort (limit {max_range} distinct keys)")
+    return lo, hi
+
+
+class CountingSort(SortingAlgorithm):
+    # This class defines the structure and logic for CountingSort
+    """
+    Counting Sort: Detects the key range, counts how often each key occurs and writes the keys back
+    in order. Runs in O(n + k) for k = max - min + 1 without comparing elements, so it only accepts
+    integer arrays whose key range fits within `max_range`.
+    """
+    def __init__(self, max_range: int = MAX_KEY_RANGE):
+        # Initializes the class instance with necessary attributes.
+        self.max_range = max_range
+
+    def generate(self, arr: List[int]) -> Generator[Dict, None, Tuple[List[int], Dict]]:
+        # Executes the sorting algorithm and yields steps for visualization.
+        if not arr:
+            return arr, {'comparisons': 0, 'swaps': 'N/A'}
+        lo, hi = key_range(arr, self.max_range)
+        counts = [0] * (hi - lo + 1)
+        for i, value in enumerate(arr):
+            counts[value - lo] += 1
+            yield {'type': 'bucket', 'indices': [i], 'explanation': f'Count {value} (seen {counts[value - lo]} times)'}
+
+        k = 0
+        for offset, count in enumerate(counts):
+            value = lo + offset
+            for _ in range(count):
+                arr[k] = value
+                yield {'type': 'insert', 'indices': [k], 'changes': [[k, value]], 'explanation': f'Write {value} at position {k}'}
+                k += 1
+
+        return arr, {'comparisons': 0, 'swaps': 'N/A'}
+
+    def sort_untraced(self, arr: List[int]) -> Tuple[List[int], Dict]:
+        # Same counting pass as generate() without building steps.
+        if not arr:
+            return arr, {'comparisons': 0, 'swaps': 'N/A'}
+        lo, hi = key_range(arr, self.max_range)
+        counts = [0] * (hi - lo + 1)
+        for value in arr:
+            counts[value - lo] += 1
+        k = 0
+        for offset, count in enumerate(counts):
+            if count:
+                arr[k:k + count] = [lo + offset] * count
+                k += count
+        return arr, {'comparisons': 0, 'swaps': 'N/A'}
@@ -0,0 +1,173 @@
+from typing import List, Dict, Iterable, Optional
+from array import array
+import heapq
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import time
+from .base import SortingAlgorithm
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+# Bytes one buffered value costs while its run is sorted: 8 in the int64 buffer, its copy in the
+# run, the list slot and int object the Python algorithms work on, and the sorted int64 copy written out.
+BYTES_PER_ITEM = 64
+MAX_FAN_IN = 64
+OUTPUT_CHUNK = 1 << 16
+INPUT_FORMATS = ('text', 'int64')
+# Longest text token accepted; any int64 fits in 20 characters, the rest is slack for leading zeros.
+MAX_TOKEN_BYTES = 64
+
+
+class ExternalSort:
+    # This class defines the structure and logic for ExternalSort
+    """
+    External Sort: Sorts inputs larger than memory. Values are fed in chunks (text or little-endian
+    int64) into an int64 buffer. Each time the buffer reaches the budget, it is sorted with
+    `algorithm` and spilled to a temporary run file. finish() k-way merges the runs with heapq,
+    reading each one through mmap, in passes of at most `fan_in` runs. It writes the sorted output
+    file in `output` format. Memory stays bounded by `memory_budget` whatever the input size.
+    Call cleanup() to delete the run and output files.
+    """
+    def __init__(self, algorithm: SortingAlgorithm, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 tmpdir: Optional[str] = None, fan_in: int = MAX_FAN_IN, input_format: str = 'text'):
+        # Initializes the class instance with necessary attributes.
+        if fan_in < 2:
+            raise ValueError("fan_in must be at least 2")
+        if input_format not in INPUT_FORMATS:
+            raise ValueError(f"Unknown input format: {input_format}")
+        self.algorithm = algorithm
+        self.input_format = input_format
+        self.run_items = max(memory_budget // BYTES_PER_ITEM, 1)
+        self.output_items = min(OUTPUT_CHUNK, self.run_items)
+        self.fan_in = fan_in
+        self.dir = tempfile.mkdtemp(prefix='external-sort-', dir=tmpdir)
+        self.buffer = array('q')
+        self.pending = b''
+        self.runs: List[str] = []
+        self.spilled_runs = 0
+        self.items = 0
+        self.merge_passes = 0
+        self.start = time.perf_counter()
+
+    def feed(self, values: Iterable[int]):
+        # Buffers values, spilling a sorted run whenever the buffer holds run_items of them.
+        # Raises OverflowError for values outside int64.
+        self.buffer.extend(values)
+        while len(self.buffer) >= self.run_items:
+            run = self.buffer[:self.run_items]
+            del self.buffer[:self.run_items]
+            self._spill(run)
+
+    def feed_bytes(self, chunk: bytes):
+        # Parses one chunk of the upload in the input format.
+        if self.input_format == 'text':
+            self.feed_text(chunk)
+        else:
+            self.feed_int64(chunk)
+
+    def feed_text(self, chunk: bytes):
+        # Parses whitespace- or comma-separated integers; a number cut at the chunk end waits for the next chunk.
+        # Raises ValueError once that unfinished token outgrows MAX_TOKEN_BYTES, so it cannot grow unbounded.
+        data = self.pending + chunk.replace(b',', b' ')
+        tokens = data.split()
+        self.pending = tokens.pop() if tokens and not data[-1:].isspace() else b''
+        if len(self.pending) > MAX_TOKEN_BYTES:
+            raise ValueError(f"Token longer than {MAX_TOKEN_BYTES} bytes")
+        self.feed(map(int, tokens))
+
+    def feed_int64(self, chunk: bytes):
+        # Takes raw little-endian int64 values; a trailing partial value waits for the next chunk.
+        data = self.pending + chunk
+        cut = len(data) - len(data) % 8
+        self.pending = data[cut:]
+        values = array('q')
+        values.frombytes(data[:cut])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        self.feed(values)
+
+    def _spill(self, run: array):
+        # Sorts one buffer with the configured algorithm and writes it to a native int64 run file.
+        sorted_run, _ = self.algorithm.sort_untraced(run.tolist())
+        fd, path = tempfile.mkstemp(suffix='.run', dir=self.dir)
+        with os.fdopen(fd, 'wb') as f:
+            array('q', sorted_run).tofile(f)
+        self.runs.append(path)
+        self.spilled_runs += 1
+        self.items += len(run)
+
+    def finish(self, output: str = 'text') -> str:
+        # Spills what is left, merges every run and returns the path of the sorted output file.
+        if output not in INPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output}")
+        if self.pending:
+            if self.input_format == 'int64':
+                raise ValueError("Input ends with a partial int64 value")
+            self.feed([int(self.pending)])
+            self.pending = b''
+        if self.buffer:
+            self._spill(self.buffer)
+            self.buffer = array('q')
+        while len(self.runs) > self.fan_in:
+            self.merge_passes += 1
+            groups = [self.runs[i:i + self.fan_in] for i in range(0, len(self.runs), self.fan_in)]
+            self.runs = [self._merge(group, 'native') for group in groups]
+        self.merge_passes += 1
+        return self._merge(self.runs, output)
+
+    def _merge(self, paths: List[str], output: str) -> str:
+        # Heap-merges sorted run files read through mmap into one new file, then deletes the inputs.
+        fd, out_path = tempfile.mkstemp(suffix='.run' if output == 'native' else '.out', dir=self.dir)
+        files, maps, views = [], [], []
+        try:
+            for path in paths:
+                f = open(path, 'rb')
+                files.append(f)
+                maps.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                views.append(memoryview(maps[-1]).cast('q'))
+            with os.fdopen(fd, 'wb') as out:
+                chunk = array('q')
+                for value in heapq.merge(*views):
+                    chunk.append(value)
+                    if len(chunk) >= self.output_items:
+                        self._write(out, chunk, output)
+                        chunk = array('q')
+                self._write(out, chunk, output)
+        finally:
+            for view in views:
+                view.release()
+            for m in maps:
+                m.close()
+            for f in files:
+                f.close()
+        for path in paths:
+            os.remove(path)
+        return out_path
+
+    @staticmethod
+    def _write(out, chunk: array, output: str):
+        # Writes a block of merged values in the requested format.
+        if not chunk:
+            return
+        if output == 'text':
+            out.write('\n'.join(map(str, chunk)).encode() + b'\n')
+            return
+        if output == 'int64' and sys.byteorder == 'big':
+            chunk.byteswap()
+        chunk.tofile(out)
+
+    def stats(self) -> Dict:
+        # Size of the job and the time spent so far.
+        return {
+            'items': self.items,
+            'runs': self.spilled_runs,
+            'run_items': self.run_items,
+            'merge_passes': self.merge_passes,
+            'time': round(time.perf_counter() - self.start, 6)
+        }
+
+    def cleanup(self):
+        # Deletes the run and output files.
+        shutil.rmtree(self.dir, ignore_errors=True)
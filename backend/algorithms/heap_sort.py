@@ -0,0 +1,88 @@
+from typing import List, Dict, Generator, Tuple
+from .base import SortingAlgorithm
+from .trace import changes
+
+
+def heapsort_range(arr: List[int], low: int, high: int) -> Generator[Dict, None, Tuple[int, int]]:
+    # Heapsorts arr[low..high] in place, yielding compare/swap steps; returns (comparisons, swaps).
+    comparisons = 0
+    swaps = 0
+    n = high - low + 1
+
+    def sift_down(root, end):
+    # Moves arr[low + root] down until the max-heap property holds for arr[low..low + end].
+        nonlocal comparisons, swaps
+        while 2 * root + 1 <= end:
+            child = 2 * root + 1
+            if child + 1 <= end:
+                comparisons += 1
+                yield {'type': 'compare', 'indices': [low + child, low + child + 1], 'explanation': f'Compare children {arr[low + child]} and {arr[low + child + 1]}'}
+                if arr[low + child] < arr[low + child + 1]:
+                    child += 1
+            comparisons += 1
+            yield {'type': 'compare', 'indices': [low + root, low + child], 'explanation': f'Compare parent {arr[low + root]} with child {arr[low + child]}'}
+            if arr[low + root] >= arr[low + child]:
+                return
+            a, b = low + root, low + child
+            arr[a], arr[b] = arr[b], arr[a]
+            swaps += 1
+            yield {'type': 'swap', 'indices': [a, b], 'changes': changes(arr, [a, b]), 'explanation': f'Sift {arr[b]} down below {arr[a]}'}
+            root = child
+
+    for start in range((n - 2) // 2, -1, -1):
+        yield from sift_down(start, n - 1)
+    for end in range(n - 1, 0, -1):
+        arr[low], arr[low + end] = arr[low + end], arr[low]
+        swaps += 1
+        yield {'type': 'swap', 'indices': [low, low + end], 'changes': changes(arr, [low, low + end]), 'explanation': f'Move max {arr[low + end]} to position {low + end}'}
+        yield from sift_down(0, end - 1)
+    return comparisons, swaps
+
+
+def heapsort_range_untraced(arr: List[int], low: int, high: int) -> Tuple[int, int]:
+    # Same as heapsort_range() without building steps.
+    comparisons = 0
+    swaps = 0
+    n = high - low + 1
+
+    def sift_down(root, end):
+    # Moves arr[low + root] down until the max-heap property holds for arr[low..low + end].
+        nonlocal comparisons, swaps
+        while 2 * root + 1 <= end:
+            child = 2 * root + 1
+            if child + 1 <= end:
+                comparisons += 1
+                if arr[low + child] < arr[low + child + 1]:
+                    child += 1
+            comparisons += 1
+            if arr[low + root] >= arr[low + child]:
+                return
+            a, b = low + root, low + child
+            arr[a], arr[b] = arr[b], arr[a]
+            swaps += 1
+            root = child
+
+    for start in range((n - 2) // 2, -1, -1):
+        sift_down(start, n - 1)
+    for end in range(n - 1, 0, -1):
+        arr[low], arr[low + end] = arr[low + end], arr[low]
+        swaps += 1
+        sift_down(0, end - 1)
+    return comparisons, swaps
+
+
+class HeapSort(SortingAlgorithm):
+    # This class defines the structure and logic for HeapSort
+    """
+    Heap Sort: Builds a max-heap in place, then repeatedly swaps the maximum to the end of the
+    array and sifts the new root down. O(n log n) in the worst case with O(1) extra memory.
+    """
+    def generate(self, arr: List[int]) -> Generator[Dict, None, Tuple[List[int], Dict]]:
+        # Executes the sorting algorithm and yields steps for visualization.
+        comparisons, swaps = yield from heapsort_range(arr, 0, len(arr) - 1)
+        return arr, {'comparisons': comparisons, 'swaps': swaps}
+
+    def sort_untraced(self, arr: List[int]) -> Tuple[List[int], Dict]:
+        # Same sift-downs as generate() without building steps.
+        comparisons, swaps = heapsort_range_untraced(arr, 0, len(arr) - 1)
+        return arr, {'comparisons': comparisons, 'swaps': swaps}
@@ -1,61 +1,96 @@
-from typing import List, Dict
+from typing import List, Dict, Generator, Iterator, Tuple
 from .base import SortingAlgorithm
-import time
+from .trace import changes
 
 class MergeSort(SortingAlgorithm):
     # This class defines the structure and logic for MergeSort
     """
     Merge Sort: A divide-and-conquer algorithm that splits the list into halves,
     recursively sorts them and then merges the sorted halves.
+    Merges read from a single preallocated auxiliary buffer with cursors and write back into the
+    array, so no sublists are sliced or popped. With bottom_up=True the runs are merged iteratively
+    in widths 1, 2, 4, ... instead of following the recursive halving.
     """
-    def sort(self, arr: List[int]) -> Dict:
-        # Executes the sorting algorithm and tracks steps for visualization.
-        steps = []
+    def __init__(self, bottom_up: bool = False):
+        # Initializes the class instance with necessary attributes.
+        self.bottom_up = bottom_up
+
+    def merge_ranges(self, n: int) -> Iterator[Tuple[int, int, int]]:
+        # Yields the (lo, mid, hi) half-open ranges to merge, in the order they must be merged.
+        if self.bottom_up:
+            width = 1
+            while width < n:
+                for lo in range(0, n - width, 2 * width):
+                    yield lo, lo + width, min(lo + 2 * width, n)
+                width *= 2
+            return
+
+        def divide(lo, hi):
+        # Recursively divides the range for merge sort.
+            if hi - lo <= 1:
+                return
+            mid = lo + (hi - lo) // 2
+            yield from divide(lo, mid)
+            yield from divide(mid, hi)
+            yield lo, mid, hi
+
+        yield from divide(0, n)
+
+    def generate(self, arr: List[int]) -> Generator[Dict, None, Tuple[List[int], Dict]]:
+        # Executes the sorting algorithm and yields steps for visualization.
+        arr = arr.copy()
+        aux = [None] * len(arr)
         comparisons = 0
 
-        def merge(left, right):
-        # Merges two sorted lists during merge sort.
-            nonlocal comparisons
-            result = []
-            while left and right:
+        for lo, mid, hi in self.merge_ranges(len(arr)):
+            aux[lo:hi] = arr[lo:hi]
+            i, j, k = lo, mid, lo
+            while i < mid and j < hi:
                 comparisons += 1
-                l_val, r_val = left[0], right[0]
-                steps.append({
+                l_val, r_val = aux[i], aux[j]
+                yield {
                     'type': 'compare',
+                    'indices': [i, j],
                     'values': [l_val, r_val],
                     'explanation': f'Compare left value {l_val} with right value {r_val}'
-                })
+                }
                 if l_val <= r_val:
-                    result.append(left.pop(0))
+                    arr[k] = l_val
+                    i += 1
                 else:
-                    result.append(right.pop(0))
-            result += left or right
-            return result
-
-        def divide(lst):
-        # Recursively divides the list for merge sort.
-            if len(lst) <= 1:
-                return lst
-            mid = len(lst) // 2
-            left = divide(lst[:mid])
-            right = divide(lst[mid:])
-            merged = merge(left, right)
-            steps.append({
+                    arr[k] = r_val
+                    j += 1
+                k += 1
+            # A leftover right run is already in place; only a leftover left run needs copying.
+            arr[k:k + mid - i] = aux[i:mid]
+            yield {
                 'type': 'merge',
-                'explanation': f'Merge step result: {merged}'
-            })
-            return merged
-
-        start_time = time.time()
-        sorted_arr = divide(arr.copy())
-        end_time = time.time()
-
-        return {
-            'steps': steps,
-            'sorted': sorted_arr,
-            'metrics': {
-                'comparisons': comparisons,
-                'swaps': 'N/A',
-                'time': round(end_time - start_time, 6)
+                'range': [lo, hi],
+                'changes': changes(arr, range(lo, hi)),
+                'explanation': f'Merge indices {lo}-{mid - 1} with {mid}-{hi - 1}'
             }
-        }
\ No newline at end of file
+
+        return arr, {'comparisons': comparisons, 'swaps': 'N/A'}
+
+    def sort_untraced(self, arr: List[int]) -> Tuple[List[int], Dict]:
+        # Same merges as generate() without building steps.
+        arr = arr.copy()
+        aux = [None] * len(arr)
+        comparisons = 0
+
+        for lo, mid, hi in self.merge_ranges(len(arr)):
+            aux[lo:hi] = arr[lo:hi]
+            i, j, k = lo, mid, lo
+            while i < mid and j < hi:
+                l_val, r_val = aux[i], aux[j]
+                if l_val <= r_val:
+                    arr[k] = l_val
+                    i += 1
+                else:
+                    arr[k] = r_val
+                    j += 1
+                k += 1
+            comparisons += k - lo
+            arr[k:k + mid - i] = aux[i:mid]
+
+        return arr, {'comparisons': comparisons, 'swaps': 'N/A'}
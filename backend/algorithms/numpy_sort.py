@@ -0,0 +1,78 @@
+from typing import List, Dict, Generator, Tuple
+from array import array
+from .base import SortingAlgorithm, as_list
+from .counting_sort import MAX_KEY_RANGE
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; NumpySort then falls back to its pure-Python algorithm.
+    np = None
+
+HAS_NUMPY = np is not None
+NUMPY_KINDS = ('quicksort', 'mergesort', 'heapsort', 'stable', 'radix', 'counting')
+RADIX_BITS = 16
+
+
+def radix_sort_int64(a):
+    # LSD radix sort of an int64 array, one vectorized stable pass per 16-bit digit of value - min.
+    if a.size == 0:
+        return a
+    lo = a.min()
+    keys = (a - lo).view(np.uint64)  # wraps modulo 2^64, which is exact for any int64 range
+    mask = np.uint64((1 << RADIX_BITS) - 1)
+    for shift in range(0, int(keys.max()).bit_length(), RADIX_BITS):
+        digits = ((keys >> np.uint64(shift)) & mask).astype(np.uint16)
+        keys = keys[np.argsort(digits, kind='stable')]
+    return keys.view(np.int64) + lo
+
+
+def counting_sort_int64(a):
+    # Counting sort of an int64 array via bincount; wide key ranges go through radix_sort_int64().
+    if a.size == 0:
+        return a
+    lo, hi = int(a.min()), int(a.max())
+    if hi - lo + 1 > MAX_KEY_RANGE:
+        return radix_sort_int64(a)
+    counts = np.bincount(a - lo)
+    return np.repeat(np.arange(lo, hi + 1, dtype=np.int64), counts)
+
+
+class NumpySort(SortingAlgorithm):
+    # This class defines the structure and logic for NumpySort
+    """
+    NumPy Sort: Bulk engine for large arrays. The input is copied once into an int64 array and
+    sorted with np.sort (quicksort/mergesort/heapsort/stable) or a vectorized radix/counting pass,
+    so it reports no comparison or swap counts. It has no per-element steps: traced runs, inputs that
+    do not fit int64, and installs without NumPy all use the pure-Python `fallback` algorithm.
+    An ingested array('q') is read through the buffer protocol without building a list.
+    """
+    accepts_buffer = True
+
+    def __init__(self, kind: str, fallback: SortingAlgorithm):
+        # Initializes the class instance with necessary attributes.
+        if kind not in NUMPY_KINDS:
+            raise ValueError(f"Unknown NumPy sort kind: {kind}")
+        self.kind = kind
+        self.fallback = fallback
+
+    def generate(self, arr: List[int]) -> Generator[Dict, None, Tuple[List[int], Dict]]:
+        # Executes the fallback algorithm so traced runs still produce steps.
+        return (yield from self.fallback.generate(arr))
+
+    def sort_untraced(self, arr: List[int]) -> Tuple[List[int], Dict]:
+        # Sorts with NumPy, or with the fallback when NumPy is missing or the input is not int64.
+        if np is None:
+            return self.fallback.sort_untraced(as_list(arr))
+        if isinstance(arr, array) and arr.typecode == 'q':
+            a = np.frombuffer(arr, dtype=np.int64).copy()
+        else:
+            a = np.array(arr)
+        if a.dtype != np.int64:
+            return self.fallback.sort_untraced(arr)
+        if self.kind == 'radix':
+            a = radix_sort_int64(a)
+        elif self.kind == 'counting':
+            a = counting_sort_int64(a)
+        else:
+            a.sort(kind=self.kind)
+        return a.tolist(), {'comparisons': 'N/A', 'swaps': 'N/A', 'engine': 'numpy'}
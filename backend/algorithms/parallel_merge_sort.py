@@ -0,0 +1,203 @@
+from typing import List, Dict, Generator, Optional, Tuple
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from multiprocessing import shared_memory
+from multiprocessing.context import BaseContext
+import os
+import threading
+import time
+from .base import SortingAlgorithm, as_list
+from .merge_sort import MergeSort
+
+MIN_PARTITION = 20000
+SAMPLES_PER_PARTITION = 64
+
+
+def worker_context() -> BaseContext:
+    # Start method for worker pools. Pools are created while other threads are running (the
+    # threadpool, the event loop), and a forked child can inherit a lock some thread holds and
+    # deadlock, so workers come from the forkserver where the platform has one, else spawn.
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def merge_two(left: List[int], right: List[int]) -> Tuple[List[int], int]:
+    # Stable two-way merge; returns (merged list, comparisons).
+    out = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        if left[i] <= right[j]:
+            out.append(left[i])
+            i += 1
+        else:
+            out.append(right[j])
+            j += 1
+    comparisons = i + j
+    out.extend(left[i:])
+    out.extend(right[j:])
+    return out, comparisons
+
+
+def merge_many(runs: List[List[int]]) -> Tuple[List[int], int]:
+    # Merges sorted runs pairwise in rounds (log k levels); returns (merged list, comparisons).
+    runs = [run for run in runs if run] or [[]]
+    comparisons = 0
+    while len(runs) > 1:
+        merged = []
+        for i in range(0, len(runs) - 1, 2):
+            run, count = merge_two(runs[i], runs[i + 1])
+            merged.append(run)
+            comparisons += count
+        if len(runs) % 2:
+            merged.append(runs[-1])
+        runs = merged
+    return runs[0], comparisons
+
+
+def _attach(name: str) -> Tuple[shared_memory.SharedMemory, memoryview]:
+    # Opens a shared int64 buffer created by the parent.
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, shm.buf.cast('q')
+
+
+def _sort_partition(name: str, lo: int, hi: int) -> Dict:
+    # Worker: sorts buffer[lo:hi] in place with MergeSort and reports its own comparisons and CPU time.
+    cpu = time.process_time()
+    shm, view = _attach(name)
+    try:
+        part, counters = MergeSort().sort_untraced(view[lo:hi].tolist())
+        view[lo:hi] = array('q', part)
+    finally:
+        view.release()
+        shm.close()
+    return {'pid': os.getpid(), 'phase': 'sort', 'items': hi - lo, 'comparisons': counters['comparisons'],
+            'cpu_time': time.process_time() - cpu}
+
+
+def _merge_bucket(src: str, dst: str, ranges: List[Tuple[int, int]], out_lo: int) -> Dict:
+    # Worker: merges one value bucket (a slice of every sorted partition) into dst[out_lo:].
+    cpu = time.process_time()
+    src_shm, src_view = _attach(src)
+    dst_shm, dst_view = _attach(dst)
+    try:
+        merged, comparisons = merge_many([src_view[lo:hi].tolist() for lo, hi in ranges])
+        dst_view[out_lo:out_lo + len(merged)] = array('q', merged)
+    finally:
+        src_view.release()
+        dst_view.release()
+        src_shm.close()
+        dst_shm.close()
+    return {'pid': os.getpid(), 'phase': 'merge', 'items': len(merged), 'comparisons': comparisons,
+            'cpu_time': time.process_time() - cpu}
+
+
+class ParallelMergeSort(SortingAlgorithm):
+    # This class defines the structure and logic for ParallelMergeSort
+    """
+    Parallel Merge Sort: Copies the input once into a shared-memory int64 buffer, which workers
+    attach to by name, so no list is pickled. The buffer is split into `workers` partitions that are
+    sorted in parallel with MergeSort. The parent then picks value splitters from samples of the
+    sorted partitions. It bisects every partition at each splitter, so each worker merges one value
+    bucket of all the partitions into its own slice of a second shared buffer. Inputs below
+    `workers * min_partition` elements, and values outside int64, use sequential MergeSort.
+    Traced runs always do. Metrics list every worker task with its comparisons and CPU time, and
+    compare the total CPU time with the wall time. An ingested array('q') is copied into shared
+    memory directly.
+    """
+    accepts_buffer = True
+
+    def __init__(self, workers: Optional[int] = None, min_partition: int = MIN_PARTITION):
+        # Initializes the class instance with necessary attributes.
+        self.workers = workers or os.cpu_count() or 1
+        self.min_partition = min_partition
+        self.sequential = MergeSort()
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.lock = threading.Lock()  # the instance is shared by concurrent threadpool requests
+
+    def generate(self, arr: List[int]) -> Generator[Dict, None, Tuple[List[int], Dict]]:
+        # Executes the sequential merge sort so traced runs still produce steps.
+        return (yield from self.sequential.generate(arr))
+
+    def pool(self) -> ProcessPoolExecutor:
+        # Worker processes, started on first use and reused across sorts.
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=worker_context())
+            return self.executor
+
+    def shutdown(self):
+        # Stops the worker processes.
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def sort_untraced(self, arr: List[int]) -> Tuple[List[int], Dict]:
+        # Sorts partitions and merges value buckets in the process pool.
+        n = len(arr)
+        workers = min(self.workers, n // self.min_partition)
+        if workers < 2:
+            return self.sequential.sort_untraced(as_list(arr))
+        if isinstance(arr, array) and arr.typecode == 'q':
+            data = arr
+        else:
+            try:
+                data = array('q', arr)
+            except OverflowError:
+                return self.sequential.sort_untraced(arr)
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        src = shared_memory.SharedMemory(create=True, size=n * data.itemsize)
+        dst = shared_memory.SharedMemory(create=True, size=n * data.itemsize)
+        src_view = src.buf.cast('q')
+        dst_view = dst.buf.cast('q')
+        try:
+            src_view[:] = data
+            del data
+            bounds = [n * i // workers for i in range(workers + 1)]
+            partitions = list(zip(bounds, bounds[1:]))
+            tasks = list(self.pool().map(_sort_partition, [src.name] * workers, *zip(*partitions)))
+
+            # Splitters: evenly spaced quantiles of a sample drawn from every sorted partition.
+            sample = sorted(
+                src_view[lo + (hi - lo) * s // SAMPLES_PER_PARTITION]
+                for lo, hi in partitions for s in range(SAMPLES_PER_PARTITION)
+            )
+            splitters = [sample[len(sample) * b // workers] for b in range(1, workers)]
+            cuts = [
+                [lo] + [lo + bisect_left(src_view[lo:hi], s) for s in splitters] + [hi]
+                for lo, hi in partitions
+            ]
+            jobs, out_lo = [], 0
+            for b in range(workers):
+                ranges = [(cut[b], cut[b + 1]) for cut in cuts]
+                jobs.append((ranges, out_lo))
+                out_lo += sum(hi - lo for lo, hi in ranges)
+            tasks += list(self.pool().map(
+                _merge_bucket, [src.name] * workers, [dst.name] * workers, *zip(*jobs)
+            ))
+            result = dst_view.tolist()
+        finally:
+            src_view.release()
+            dst_view.release()
+            for shm in (src, dst):
+                shm.close()
+                shm.unlink()
+
+        wall_time = time.perf_counter() - wall
+        cpu_time = time.process_time() - cpu + sum(task['cpu_time'] for task in tasks)
+        for task in tasks:
+            task['cpu_time'] = round(task['cpu_time'], 6)
+        return result, {
+            'comparisons': sum(task['comparisons'] for task in tasks),
+            'swaps': 'N/A',
+            'engine': 'parallel',
+            'workers': workers,
+            'per_worker': tasks,
+            'wall_time': round(wall_time, 6),
+            'cpu_time': round(cpu_time, 6),
+            'speedup': round(cpu_time / wall_time, 3) if wall_time else None
+        }
@@ -1,54 +1,205 @@
-from typing import List, Dict
+from typing import List, Dict, Generator, Optional, Tuple
 from .base import SortingAlgorithm
-import time
+from .heap_sort import heapsort_range, heapsort_range_untraced
+from .trace import changes
+import random
+
+PIVOT_STRATEGIES = ('last', 'median3', 'random')
+PARTITION_SCHEMES = ('lomuto', 'three_way')
+
+
+def median_of_three(arr: List[int], low: int, high: int) -> Tuple[int, int]:
+    # Returns (index of the median of arr[low], arr[mid], arr[high], comparisons used).
+    a, b, c = low, (low + high) // 2, high
+    if arr[a] > arr[b]:
+        a, b = b, a
+    if arr[b] <= arr[c]:
+        return b, 2
+    return (c if arr[a] <= arr[c] else a), 3
+
 
 class QuickSort(SortingAlgorithm):
     # This class defines the structure and logic for QuickSort
     """
     Quick Sort: Divide-and-conquer algorithm that picks an element as pivot and partitions the array.
+    The pivot is the last element, the median of first/middle/last, or a random element. 'lomuto'
+    partitioning splits around one pivot position; 'three_way' (Dutch national flag) groups all keys
+    equal to the pivot in the middle so duplicate-heavy input stays fast. Only the smaller side is
+    recursed into and the larger one is looped on, so recursion depth stays logarithmic. With
+    introsort=True a range still being partitioned after 2*log2(n) levels is finished with heapsort.
     """
-    def sort(self, arr: List[int]) -> Dict:
-        # Executes the sorting algorithm and tracks steps for visualization.
-        steps = []
+    def __init__(self, pivot: str = 'last', partition: str = 'lomuto', introsort: bool = False, seed: Optional[int] = None):
+        # Initializes the class instance with necessary attributes.
+        if pivot not in PIVOT_STRATEGIES:
+            raise ValueError(f"Unknown pivot strategy: {pivot}")
+        if partition not in PARTITION_SCHEMES:
+            raise ValueError(f"Unknown partition scheme: {partition}")
+        self.pivot = pivot
+        self.partition = partition
+        self.introsort = introsort
+        self.seed = seed
+
+    def depth_limit(self, n: int) -> float:
+        # Partitioning levels allowed before falling back to heapsort.
+        return 2 * n.bit_length() if self.introsort else float('inf')
+
+    def generate(self, arr: List[int]) -> Generator[Dict, None, Tuple[List[int], Dict]]:
+        # Executes the sorting algorithm and yields steps for visualization.
         comparisons = 0
         swaps = 0
+        rng = random.Random(self.seed)
 
-        def quicksort(low, high):
-        # Executes the sorting algorithm and tracks steps for visualization.
+        def quicksort(low, high, depth):
+        # Executes the sorting algorithm and yields steps for visualization.
             nonlocal comparisons, swaps
-            if low < high:
-                pi = partition(low, high)
-                quicksort(low, pi - 1)
-                quicksort(pi + 1, high)
+            while low < high:
+                if depth <= 0:
+                    heap_comparisons, heap_swaps = yield from heapsort_range(arr, low, high)
+                    comparisons += heap_comparisons
+                    swaps += heap_swaps
+                    return
+                depth -= 1
+                p = yield from select_pivot(low, high)
+                if self.partition == 'three_way':
+                    lt, gt = yield from partition_three_way(low, high, p)
+                else:
+                    lt = gt = yield from partition(low, high, p)
+                if lt - low < high - gt:
+                    yield from quicksort(low, lt - 1, depth)
+                    low = gt + 1
+                else:
+                    yield from quicksort(gt + 1, high, depth)
+                    high = lt - 1
+
+        def select_pivot(low, high):
+        # Picks the pivot index for arr[low..high] according to the pivot strategy.
+            nonlocal comparisons
+            if self.pivot == 'median3':
+                p, used = median_of_three(arr, low, high)
+                comparisons += used
+                mid = (low + high) // 2
+                yield {'type': 'compare', 'indices': [low, mid, high], 'explanation': f'Pick median of {arr[low]}, {arr[mid]} and {arr[high]} as pivot'}
+                return p
+            if self.pivot == 'random':
+                return rng.randint(low, high)
+            return high
 
-        def partition(low, high):
+        def partition(low, high, p):
         # Partitions the list around a pivot for quicksort.
             nonlocal comparisons, swaps
+            if p != high:
+                arr[p], arr[high] = arr[high], arr[p]
+                swaps += 1
+                yield {'type': 'swap', 'indices': [p, high], 'changes': changes(arr, [p, high]), 'explanation': f'Move pivot {arr[high]} to the end'}
             pivot = arr[high]
             i = low - 1
             for j in range(low, high):
                 comparisons += 1
-                steps.append({'type': 'compare', 'indices': [j, high], 'explanation': f'Compare {arr[j]} with pivot {pivot}'})
+                yield {'type': 'compare', 'indices': [j, high], 'explanation': f'Compare {arr[j]} with pivot {pivot}'}
                 if arr[j] <= pivot:
                     i += 1
                     arr[i], arr[j] = arr[j], arr[i]
                     swaps += 1
-                    steps.append({'type': 'swap', 'indices': [i, j], 'array': arr.copy(), 'explanation': f'Swap {arr[i]} with {arr[j]}'})
+                    yield {'type': 'swap', 'indices': [i, j], 'changes': changes(arr, [i, j]), 'explanation': f'Swap {arr[i]} with {arr[j]}'}
             arr[i + 1], arr[high] = arr[high], arr[i + 1]
             swaps += 1
-            steps.append({'type': 'swap', 'indices': [i + 1, high], 'array': arr.copy(), 'explanation': f'Swap pivot {pivot} to position {i + 1}'})
+            yield {'type': 'swap', 'indices': [i + 1, high], 'changes': changes(arr, [i + 1, high]), 'explanation': f'Swap pivot {pivot} to position {i + 1}'}
             return i + 1
 
-        start_time = time.time()
-        quicksort(0, len(arr) - 1)
-        end_time = time.time()
-
-        return {
-            'steps': steps,
-            'sorted': arr,
-            'metrics': {
-                'comparisons': comparisons,
-                'swaps': swaps,
-                'time': round(end_time - start_time, 6)
-            }
-        }
\ No newline at end of file
+        def partition_three_way(low, high, p):
+        # Splits arr[low..high] into < pivot, == pivot and > pivot; returns the bounds of the middle part.
+            nonlocal comparisons, swaps
+            pivot = arr[p]
+            lt, i, gt = low, low, high
+            while i <= gt:
+                comparisons += 1
+                yield {'type': 'compare', 'indices': [i, p], 'explanation': f'Compare {arr[i]} with pivot {pivot}'}
+                if arr[i] < pivot:
+                    if lt != i:
+                        arr[lt], arr[i] = arr[i], arr[lt]
+                        swaps += 1
+                        yield {'type': 'swap', 'indices': [lt, i], 'changes': changes(arr, [lt, i]), 'explanation': f'Move {arr[lt]} before the pivot block'}
+                    if p == lt:
+                        p = i
+                    lt += 1
+                    i += 1
+                elif arr[i] > pivot:
+                    arr[i], arr[gt] = arr[gt], arr[i]
+                    swaps += 1
+                    yield {'type': 'swap', 'indices': [i, gt], 'changes': changes(arr, [i, gt]), 'explanation': f'Move {arr[gt]} after the pivot block'}
+                    if p == gt:
+                        p = i
+                    gt -= 1
+                else:
+                    i += 1
+            return lt, gt
+
+        yield from quicksort(0, len(arr) - 1, self.depth_limit(len(arr)))
+        return arr, {'comparisons': comparisons, 'swaps': swaps}
+
+    def sort_untraced(self, arr: List[int]) -> Tuple[List[int], Dict]:
+        # Same partitioning as generate() without building steps.
+        comparisons = 0
+        swaps = 0
+        rng = random.Random(self.seed)
+        three_way = self.partition == 'three_way'
+
+        def quicksort(low, high, depth):
+        # Sorts arr[low..high] in place.
+            nonlocal comparisons, swaps
+            while low < high:
+                if depth <= 0:
+                    heap_comparisons, heap_swaps = heapsort_range_untraced(arr, low, high)
+                    comparisons += heap_comparisons
+                    swaps += heap_swaps
+                    return
+                depth -= 1
+                if self.pivot == 'median3':
+                    p, used = median_of_three(arr, low, high)
+                    comparisons += used
+                elif self.pivot == 'random':
+                    p = rng.randint(low, high)
+                else:
+                    p = high
+                if three_way:
+                    pivot = arr[p]
+                    lt, i, gt = low, low, high
+                    while i <= gt:
+                        value = arr[i]
+                        if value < pivot:
+                            if lt != i:
+                                arr[lt], arr[i] = value, arr[lt]
+                                swaps += 1
+                            lt += 1
+                            i += 1
+                        elif value > pivot:
+                            arr[i], arr[gt] = arr[gt], value
+                            swaps += 1
+                            gt -= 1
+                        else:
+                            i += 1
+                    comparisons += high - low + 1
+                else:
+                    if p != high:
+                        arr[p], arr[high] = arr[high], arr[p]
+                        swaps += 1
+                    pivot = arr[high]
+                    i = low - 1
+                    for j in range(low, high):
+                        if arr[j] <= pivot:
+                            i += 1
+                            arr[i], arr[j] = arr[j], arr[i]
+                            swaps += 1
+                    arr[i + 1], arr[high] = arr[high], arr[i + 1]
+                    comparisons += high - low
+                    swaps += 1
+                    lt = gt = i + 1
+                if lt - low < high - gt:
+                    quicksort(low, lt - 1, depth)
+                    low = gt + 1
+                else:
+                    quicksort(gt + 1, high, depth)
+                    high = lt - 1
+
+        quicksort(0, len(arr) - 1, self.depth_limit(len(arr)))
+        return arr, {'comparisons': comparisons, 'swaps': swaps}
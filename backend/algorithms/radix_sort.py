@@ -0,0 +1,74 @@
+from typing import List, Dict, Generator, Tuple
+from .base import SortingAlgorithm
+from .trace import changes
+
+class RadixSort(SortingAlgorithm):
+    # This class defines the structure and logic for RadixSort
+    """
+    Radix Sort (LSD): Shifts every key by the minimum so negatives work, then runs one stable
+    counting pass per `radix_bits`-wide digit, least significant first. Each pass is O(n + 2^bits),
+    with the number of passes set by the bit length of the key range. Integer keys only.
+    """
+    def __init__(self, radix_bits: int = 8):
+        # Initializes the class instance with necessary attributes.
+        if radix_bits < 1:
+            raise ValueError("radix_bits must be at least 1")
+        self.radix_bits = radix_bits
+
+    def passes(self, arr: List[int]) -> Tuple[int, int]:
+        # Returns (minimum key, number of digit passes needed for the key range).
+        lo = min(arr)
+        span = (max(arr) - lo).bit_length()
+        return lo, -(-span // self.radix_bits)
+
+    def generate(self, arr: List[int]) -> Generator[Dict, None, Tuple[List[int], Dict]]:
+        # Executes the sorting algorithm and yields steps for visualization.
+        if not arr:
+            return arr, {'comparisons': 0, 'swaps': 'N/A'}
+        lo, passes = self.passes(arr)
+        mask = (1 << self.radix_bits) - 1
+        buffer = [None] * len(arr)
+
+        for d in range(passes):
+            shift = d * self.radix_bits
+            counts = [0] * (mask + 2)
+            for i, value in enumerate(arr):
+                digit = ((value - lo) >> shift) & mask
+                counts[digit + 1] += 1
+                yield {'type': 'bucket', 'indices': [i], 'explanation': f'Put {value} in bucket {digit} of digit {d}'}
+            for b in range(mask + 1):
+                counts[b + 1] += counts[b]
+            for value in arr:
+                digit = ((value - lo) >> shift) & mask
+                buffer[counts[digit]] = value
+                counts[digit] += 1
+            arr[:] = buffer
+            yield {
+                'type': 'merge',
+                'range': [0, len(arr)],
+                'changes': changes(arr, range(len(arr))),
+                'explanation': f'Collect buckets of digit {d} in order'
+            }
+
+        return arr, {'comparisons': 0, 'swaps': 'N/A'}
+
+    def sort_untraced(self, arr: List[int]) -> Tuple[List[int], Dict]:
+        # Same digit passes as generate() without building steps.
+        if not arr:
+            return arr, {'comparisons': 0, 'swaps': 'N/A'}
+        lo, passes = self.passes(arr)
+        mask = (1 << self.radix_bits) - 1
+        buffer = [None] * len(arr)
+        for d in range(passes):
+            shift = d * self.radix_bits
+            digits = [((value - lo) >> shift) & mask for value in arr]
+            counts = [0] * (mask + 2)
+            for digit in digits:
+                counts[digit + 1] += 1
+            for b in range(mask + 1):
+                counts[b + 1] += counts[b]
+            for value, digit in zip(arr, digits):
+                buffer[counts[digit]] = value
+                counts[digit] += 1
+            arr[:] = buffer
+        return arr, {'comparisons': 0, 'swaps': 'N/A'}
@@ -0,0 +1,161 @@
+from typing import List, Dict, Iterable, Optional
+import math
+import random
+from .counting_sort import MAX_KEY_RANGE
+
+SMALL_INPUT = 16
+INVERSION_SAMPLES = 2000
+
+
+def natural_runs(arr: List) -> int:
+    # Counts Timsort-style natural runs: maximal non-descending or strictly descending stretches.
+    n = len(arr)
+    runs, i = 0, 0
+    while i < n:
+        runs += 1
+        j = i + 1
+        if j < n and arr[j] < arr[i]:
+            while j < n and arr[j] < arr[j - 1]:
+                j += 1
+        else:
+            while j < n and arr[j] >= arr[j - 1]:
+                j += 1
+        i = j
+    return runs
+
+
+def inversion_ratio(arr: List, samples: int = INVERSION_SAMPLES, seed: int = 0) -> float:
+    # Fraction of pairs i < j with arr[i] > arr[j]: exact for small arrays, else estimated from
+    # `samples` random pairs (0 for sorted input, 1 for strictly descending input).
+    n = len(arr)
+    pairs = n * (n - 1) // 2
+    if pairs == 0:
+        return 0.0
+    if pairs <= samples:
+        inversions = sum(1 for i in range(n) for j in range(i + 1, n) if arr[i] > arr[j])
+        return inversions / pairs
+    rng = random.Random(seed)
+    inversions = 0
+    for _ in range(samples):
+        i, j = rng.randrange(n), rng.randrange(n - 1)
+        if j >= i:
+            j += 1
+        else:
+            i, j = j, i
+        inversions += arr[i] > arr[j]
+    return inversions / samples
+
+
+def analyze(arr: List, samples: int = INVERSION_SAMPLES, seed: int = 0) -> Dict:
+    # Presortedness measures in O(n + samples): size, natural runs, descents, sampled inversion
+    # ratio, duplicate ratio, value range and whether every value is an int.
+    n = len(arr)
+    if n == 0:
+        return {'size': 0, 'runs': 0, 'descents': 0, 'inversion_ratio': 0.0, 'duplicate_ratio': 0.0,
+                'min': None, 'max': None, 'integers': True}
+    descents = sum(1 for i in range(1, n) if arr[i] < arr[i - 1])
+    return {
+        'size': n,
+        'runs': natural_runs(arr),
+        'descents': descents,
+        'inversion_ratio': round(inversion_ratio(arr, samples, seed), 4),
+        'duplicate_ratio': round(1 - len(set(arr)) / n, 4),
+        'min': min(arr),
+        'max': max(arr),
+        'integers': all(type(v) is int for v in arr),
+    }
+
+
+def classify(features: Dict) -> str:
+    # Maps the measures onto the closest benchmark.py input distribution.
+    n = features['size']
+    if n < 2 or features['descents'] == 0:
+        return 'sorted'
+    if features['descents'] == n - 1:
+        return 'reversed'
+    if features['inversion_ratio'] < 0.05:
+        return 'nearly_sorted'
+    if features['duplicate_ratio'] > 0.9:
+        return 'few_unique'
+    if features['runs'] <= 2:
+        return 'organ_pipe'
+    return 'random'
+
+
+def summary(features: Dict) -> str:
+    # Compact one-line description of the measures (used in place of the raw array in AI prompts).
+    return (
+        f"n={features['size']}, natural runs={features['runs']}, descents={features['descents']}, "
+        f"inversion ratio={features['inversion_ratio']}, duplicate ratio={features['duplicate_ratio']}, "
+        f"range={features['min']}..{features['max']}, {'integers' if features['integers'] else 'non-integers'}"
+    )
+
+
+def calibrate(report: Dict, algorithms: Optional[Iterable[str]] = None) -> Dict[str, List[List]]:
+    # Reduces a benchmark.py report to the fastest algorithm per distribution and size:
+    # {distribution: [[size, algorithm], ...] in size order}, optionally restricted to `algorithms`.
+    allowed = set(algorithms) if algorithms is not None else None
+    best = {}
+    for entry in report['results']:
+        if 'time_ns' not in entry or (allowed is not None and entry['algorithm'] not in allowed):
+            continue
+        case = (entry['distribution'], entry['size'])
+        median = entry['time_ns']['median']
+        if case not in best or median < best[case][0]:
+            best[case] = (median, entry['algorithm'])
+    table = {}
+    for (distribution, size), (_, algo) in sorted(best.items()):
+        table.setdefault(distribution, []).append([size, algo])
+    return table
+
+
+def applicable(algo: str, features: Dict) -> bool:
+    # Whether the algorithm accepts this input (integer-only sorts need int keys in range).
+    if algo.endswith('radix') or algo.endswith('counting'):
+        if not features['integers']:
+            return False
+    if algo.endswith('counting') and features['size']:
+        return features['max'] - features['min'] + 1 <= MAX_KEY_RANGE
+    return True
+
+
+def heuristic_candidates(features: Dict) -> List[tuple]:
+    # Ordered (algorithm, reason) choices derived from the measures; the first available one wins.
+    n = features['size']
+    candidates = []
+    if n <= SMALL_INPUT:
+        candidates.append(('insertion', f'only {n} elements, where insertion sort has the least overhead'))
+    if features['runs'] <= max(2, n // 64):
+        candidates.append(('tim', f'{features["runs"]} natural run(s); Timsort merges existing runs in near-linear time'))
+    if features['inversion_ratio'] < 0.05:
+        candidates.append(('tim', 'nearly sorted (few inversions); Timsort and galloping exploit the existing order'))
+    if features['integers'] and n and features['max'] - features['min'] + 1 <= max(2 * n, 256):
+        candidates.append(('counting', f'integer keys within a range of {features["max"] - features["min"] + 1}; counting sort is O(n + k)'))
+    if features['duplicate_ratio'] >= 0.5:
+        candidates.append(('quick_3way', f'{features["duplicate_ratio"]:.0%} duplicates; three-way partitioning groups equal keys once'))
+    if features['integers'] and n >= 1024 and (features['max'] - features['min']).bit_length() <= 32:
+        candidates.append(('radix', 'many integer keys of at most 32 bits; LSD radix sort needs no comparisons'))
+    candidates.append(('introsort', 'no exploitable structure; introsort gives O(n log n) quicksort speed with a heapsort guard'))
+    candidates.append(('merge', 'general-purpose O(n log n) stable sort'))
+    return candidates
+
+
+def recommend(arr: List, algorithms: Iterable[str], calibration: Optional[Dict[str, List[List]]] = None,
+              features: Optional[Dict] = None) -> Dict:
+    # Recommends one of `algorithms` for arr: from the calibration table when it covers the input's
+    # distribution (nearest benchmarked size on a log scale), else from the heuristic rules.
+    available = set(algorithms)
+    features = features or analyze(arr)
+    distribution = classify(features)
+    result = {'distribution': distribution, 'features': features}
+    sizes = (calibration or {}).get(distribution)
+    if sizes:
+        n = max(features['size'], 1)
+        size, algo = min(sizes, key=lambda entry: abs(math.log(max(entry[0], 1)) - math.log(n)))
+        if algo in available and applicable(algo, features):
+            return {**result, 'algorithm': algo, 'source': 'calibrated',
+                    'reason': f'fastest on benchmarked {distribution} input of {size} elements'}
+    for algo, reason in heuristic_candidates(features):
+        if algo in available and applicable(algo, features):
+            return {**result, 'algorithm': algo, 'source': 'heuristic', 'reason': reason}
+    raise ValueError("None of the available algorithms accepts this input")
@@ -0,0 +1,122 @@
+from typing import List, Dict, Optional
+from array import array
+from collections import OrderedDict
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def cache_key(algo: str, options: Dict, arr: List[int]) -> str:
+    # Content-addressed key: a hash of the algorithm name, its options and the input values.
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(json.dumps([algo, options], sort_keys=True).encode())
+    try:
+        digest.update((arr if isinstance(arr, array) and arr.typecode == 'q' else array('q', arr)).tobytes())
+    except (OverflowError, TypeError):
+        digest.update(repr(list(arr)).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    # This class defines the structure and logic for ResultCache
+    """
+    Result Cache: Keeps serialized sort responses in memory in LRU order, bounded by the total
+    size of the stored bytes. With `path` set, entries evicted from memory spill to a SQLite file
+    (bounded by `disk_max_bytes`, oldest use evicted first) and are promoted back on a hit.
+    Thread-safe, since sync endpoints run in FastAPI's threadpool.
+    """
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, path: Optional[str] = None, disk_max_bytes: Optional[int] = None):
+        # Initializes the class instance with necessary attributes.
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes if disk_max_bytes is not None else 16 * max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB, size INTEGER, used REAL)"
+            )
+            self.db.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        # Returns the stored bytes for key, or None on a miss.
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if self.db is not None:
+                row = self.db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.db.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self.db.commit()
+                    self.hits += 1
+                    self._insert(key, row[0])
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: bytes) -> bool:
+        # Stores value under key, evicting least recently used entries past the byte budget.
+        # Returns False when the value exceeds the budget and was not kept (no disk store, or too large for it).
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            return self._insert(key, value)
+
+    def _insert(self, key: str, value: bytes) -> bool:
+        # Adds an entry and evicts (or spills) until the memory budget holds; returns whether it was kept.
+        # Caller holds the lock.
+        if len(value) > self.max_bytes:
+            return self._spill(key, value)
+        self.entries[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            old_key, old_value = self.entries.popitem(last=False)
+            self.size -= len(old_value)
+            self.evictions += 1
+            self._spill(old_key, old_value)
+        return True
+
+    def _spill(self, key: str, value: bytes) -> bool:
+        # Writes an evicted entry to the SQLite store, trimming it to disk_max_bytes; returns whether
+        # it was written. Caller holds the lock.
+        if self.db is None or len(value) > self.disk_max_bytes:
+            return False
+        self.db.execute(
+            "INSERT OR REPLACE INTO results (key, value, size, used) VALUES (?, ?, ?, ?)",
+            (key, value, len(value), time.time())
+        )
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        while total > self.disk_max_bytes:
+            old_key, old_size = self.db.execute("SELECT key, size FROM results ORDER BY used LIMIT 1").fetchone()
+            self.db.execute("DELETE FROM results WHERE key = ?", (old_key,))
+            total -= old_size
+        self.db.commit()
+        return True
+
+    def stats(self) -> Dict:
+        # Hit/miss counters and current usage.
+        with self.lock:
+            disk_entries = 0
+            if self.db is not None:
+                disk_entries = self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'disk_entries': disk_entries
+            }
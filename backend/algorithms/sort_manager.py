@@ -1,22 +1,159 @@
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional, Tuple
+from array import array
+import json
+from .base import SortingAlgorithm, as_list
 from .bubble_sort import BubbleSort
 from .merge_sort import MergeSort
 from .insertion_sort import InsertionSort
 from .quick_sort import QuickSort
+from .heap_sort import HeapSort
+from .tim_sort import TimSort
+from .radix_sort import RadixSort
+from .counting_sort import CountingSort
+from .numpy_sort import NumpySort, HAS_NUMPY
+from .parallel_merge_sort import ParallelMergeSort
+from .result_cache import ResultCache, cache_key
+from .trace import TraceOptions
+from .trace_codec import JSON_MEDIA_TYPE, encode
+from .recommender import recommend, calibrate
+
+NUMPY_THRESHOLD = 5000
+
+# Untraced requests at or above the threshold are served by the NumPy engine matching the algorithm.
+NUMPY_ROUTES = {
+    "quick": "numpy_quick",
+    "quick_median3": "numpy_quick",
+    "quick_random": "numpy_quick",
+    "quick_3way": "numpy_quick",
+    "introsort": "numpy_quick",
+    "merge": "numpy_merge",
+    "merge_bottom_up": "numpy_merge",
+    "tim": "numpy_merge",
+    "heap": "numpy_heap",
+    "radix": "numpy_radix",
+    "counting": "numpy_counting",
+}
 
 class SortManager:
     # This class defines the structure and logic for SortManager:
-    def __init__(self):
+    def __init__(self, numpy_threshold: int = NUMPY_THRESHOLD, cache: Optional[ResultCache] = None,
+                 calibration: Optional[Dict] = None, parallel_workers: Optional[int] = None,
+                 traces: Optional[ResultCache] = None):
         # Initializes the class instance with necessary attributes.
+        self.numpy_threshold = numpy_threshold
+        self.cache = cache
+        self.traces = traces
+        self.calibration = calibration
         self.algorithms = {
             "bubble": BubbleSort(),
             "merge": MergeSort(),
+            "merge_bottom_up": MergeSort(bottom_up=True),
+            "merge_parallel": ParallelMergeSort(parallel_workers),
             "insertion": InsertionSort(),
-            "quick": QuickSort()
+            "quick": QuickSort(),
+            "quick_median3": QuickSort(pivot='median3'),
+            "quick_random": QuickSort(pivot='random', seed=0),  # seeded so replays give identical traces
+            "quick_3way": QuickSort(pivot='median3', partition='three_way'),
+            "introsort": QuickSort(pivot='median3', partition='three_way', introsort=True),
+            "heap": HeapSort(),
+            "tim": TimSort(),
+            "radix": RadixSort(),
+            "counting": CountingSort()
 }
+        self.algorithms.update({
+            "numpy_quick": NumpySort('quicksort', self.algorithms["introsort"]),
+            "numpy_merge": NumpySort('stable', self.algorithms["tim"]),
+            "numpy_heap": NumpySort('heapsort', self.algorithms["heap"]),
+            "numpy_radix": NumpySort('radix', self.algorithms["radix"]),
+            "numpy_counting": NumpySort('counting', self.algorithms["counting"])
+        })
+        for name, algorithm in self.algorithms.items():
+            algorithm.name = name  # label used by instrumentation hooks
 
-    def sort(self, algo: str, array: List[int]) -> Dict:
-        # Executes the sorting algorithms and tracks steps for visualization.
+    def get(self, algo: str) -> SortingAlgorithm:
+        # Looks up a registered algorithm by name.
         if algo in self.algorithms:
-            return self.algorithms[algo].sort(array)
-        raise ValueError(f"Unknown algorithm: {algo}")
\ No newline at end of file
+            return self.algorithms[algo]
+        raise ValueError(f"Unknown algorithm: {algo}")
+
+    def recommendable(self) -> List[str]:
+        # Names a recommendation may pick; the NumPy engines are reached through route() instead.
+        engines = set(NUMPY_ROUTES.values())
+        return [name for name in self.algorithms if name not in engines]
+
+    def calibrate(self, report: Dict):
+        # Uses a benchmark.py report to override the heuristic recommendations it covers.
+        self.calibration = calibrate(report, self.recommendable())
+
+    def recommend(self, array: List[int], features: Optional[Dict] = None) -> Dict:
+        # Picks an algorithm for the array from its presortedness measures (see recommender.py).
+        return recommend(array, self.recommendable(), self.calibration, features)
+
+    def route(self, algo: str, size: int, trace: bool = True) -> SortingAlgorithm:
+        # Picks the engine for a request: large untraced arrays go to NumPy when it is installed.
+        if not trace and HAS_NUMPY and size >= self.numpy_threshold and algo in NUMPY_ROUTES:
+            return self.algorithms[NUMPY_ROUTES[algo]]
+        return self.get(algo)
+
+    def sort(self, algo: str, array: List[int], trace_format: str = 'delta', trace: bool = True,
+             options: Optional[TraceOptions] = None) -> Dict:
+        # Executes the sorting algorithms and tracks steps for visualization (metrics only when trace=False).
+        # `options` samples and windows the steps; see TraceOptions.
+        return self.route(algo, len(array), trace).sort(array, trace_format, trace, options)
+
+    def stream(self, algo: str, array: List[int], trace_format: str = 'delta',
+               options: Optional[TraceOptions] = None) -> Iterator[Dict]:
+        # Lazily yields the steps of a sort, ending with a 'done' step holding the result.
+        return self.get(algo).iter_steps(array, trace_format, options=options)
+
+    def lookup(self, algo: str, array: List[int], trace_format: str = 'delta', trace: bool = True,
+               media_type: str = JSON_MEDIA_TYPE, options: Optional[TraceOptions] = None,
+               input_key: Optional[str] = None) -> Tuple[Optional[str], Optional[bytes]]:
+        # Returns (cache key, cached body or None); the key is None when caching is off.
+        # `input_key` (from input_key()) stands in for the array so it is not hashed twice.
+        if self.cache is None:
+            return None, None
+        self.get(algo)
+        settings = {'trace_format': trace_format, 'trace': trace, 'media_type': media_type}
+        if trace and options is not None and not options.is_default():
+            settings['options'] = options.as_dict()
+        if input_key is not None:
+            key = cache_key(algo, {**settings, 'input': input_key}, [])
+        else:
+            key = cache_key(algo, settings, array)
+        return key, self.cache.get(key)
+
+    def input_key(self, algo: str, array: List[int], trace_format: str = 'delta') -> str:
+        # Hash of a traced input; it is also the ID under which remember_trace() keeps it.
+        self.get(algo)
+        return cache_key(algo, {'trace_format': trace_format}, array)
+
+    def remember_trace(self, trace_id: str, algo: str, array: List[int], trace_format: str = 'delta') -> bool:
+        # Keeps the input of a sampled trace under its input_key() so later windows can be fetched
+        # by ID. Returns False when there is no store or the input exceeds its budget.
+        if self.traces is None:
+            return False
+        return self.traces.put(trace_id, json.dumps([algo, trace_format, as_list(array)], separators=(',', ':')).encode())
+
+    def recall_trace(self, trace_id: str) -> Tuple[str, array, str]:
+        # Returns (algorithm, array, trace_format) of a remembered trace; KeyError if unknown or evicted.
+        # The values come back as an array('q'), which sorts copy, like an ingested request body.
+        stored = self.traces.get(trace_id) if self.traces is not None else None
+        if stored is None:
+            raise KeyError(trace_id)
+        algo, trace_format, values = json.loads(stored)
+        return algo, array('q', values), trace_format
+
+    def store(self, key: Optional[str], result: Dict, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+        # Serializes a result once (JSON or a binary encoding) and keeps the bytes under key for replays.
+        body = encode(result, media_type)
+        if key is not None:
+            self.cache.put(key, body)
+        return body
+
+    def sort_json(self, algo: str, array: List[int], trace_format: str = 'delta', trace: bool = True) -> bytes:
+        # Like sort(), but returns the JSON body, served straight from the cache on a hit.
+        key, body = self.lookup(algo, array, trace_format, trace)
+        if body is None:
+            body = self.store(key, self.sort(algo, array, trace_format, trace))
+        return body
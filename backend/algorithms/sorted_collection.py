@@ -0,0 +1,256 @@
+from typing import List, Dict, Iterator, Optional
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+import threading
+import uuid
+from .tim_sort import TimSort
+
+DEFAULT_LOAD = 512
+DEFAULT_MAX_SESSIONS = 1024
+DEFAULT_MAX_ITEMS = 1_000_000
+
+
+class SortedCollection:
+    # This class defines the structure and logic for SortedCollection
+    """
+    Sorted Collection: A blocked sorted list. Values live in sorted blocks of at most 2 * `load`
+    items, with each block's maximum kept in a separate list. An insert or delete bisects that
+    list, then the block, so it touches O(load) items instead of the whole array. Rank and index
+    lookups use a prefix-length index that is rebuilt lazily after each change. Bulk inserts of at
+    least an eighth of the collection's size merge through TimSort, whose galloping merge takes the
+    existing values as a single run; smaller batches are inserted one value at a time.
+    """
+    def __init__(self, values: Optional[List[int]] = None, load: int = DEFAULT_LOAD):
+        # Initializes the class instance with necessary attributes.
+        if load < 1:
+            raise ValueError("load must be at least 1")
+        self.load = load
+        self.blocks: List[List[int]] = []
+        self.maxes: List[int] = []
+        self.offsets: Optional[List[int]] = None
+        self.size = 0
+        if values:
+            self._rebuild(TimSort().sort_untraced(list(values))[0])
+
+    def __len__(self) -> int:
+        # Number of values held.
+        return self.size
+
+    def __iter__(self) -> Iterator[int]:
+        # Yields the values in sorted order.
+        for block in self.blocks:
+            yield from block
+
+    def __contains__(self, value: int) -> bool:
+        # Membership test by bisection.
+        b = bisect_left(self.maxes, value)
+        return b < len(self.blocks) and self.blocks[b][bisect_left(self.blocks[b], value)] == value
+
+    def _rebuild(self, values: List[int]):
+        # Cuts an already sorted list into blocks of `load` items.
+        self.blocks = [values[i:i + self.load] for i in range(0, len(values), self.load)]
+        self.maxes = [block[-1] for block in self.blocks]
+        self.size = len(values)
+        self.offsets = None
+
+    def _index(self) -> List[int]:
+        # Prefix lengths of the blocks, rebuilt only after a change.
+        if self.offsets is None:
+            self.offsets, total = [], 0
+            for block in self.blocks:
+                self.offsets.append(total)
+                total += len(block)
+        return self.offsets
+
+    def add(self, value: int):
+        # Inserts one value in O(log n + load).
+        if not self.blocks:
+            self.blocks, self.maxes = [[value]], [value]
+        else:
+            b = min(bisect_right(self.maxes, value), len(self.blocks) - 1)
+            block = self.blocks[b]
+            insort(block, value)
+            self.maxes[b] = block[-1]
+            if len(block) > 2 * self.load:
+                self.blocks[b:b + 1] = [block[:self.load], block[self.load:]]
+                self.maxes[b:b + 1] = [self.blocks[b][-1], block[-1]]
+        self.size += 1
+        self.offsets = None
+
+    def update(self, values: List[int]):
+        # Inserts many values: one by one for a small batch, else one TimSort merge of both runs.
+        if len(values) * 8 < self.size:
+            for value in values:
+                self.add(value)
+        else:
+            merged, _ = TimSort().sort_untraced(list(self) + list(values))
+            self._rebuild(merged)
+
+    def remove(self, value: int):
+        # Deletes one occurrence of value; raises ValueError if it is absent.
+        b = bisect_left(self.maxes, value)
+        if b < len(self.blocks):
+            block = self.blocks[b]
+            i = bisect_left(block, value)
+            if block[i] == value:
+                del block[i]
+                if block:
+                    self.maxes[b] = block[-1]
+                else:
+                    del self.blocks[b], self.maxes[b]
+                self.size -= 1
+                self.offsets = None
+                return
+        raise ValueError(f"{value} is not in the collection")
+
+    def rank(self, value: int) -> int:
+        # Number of values strictly less than value.
+        b = bisect_left(self.maxes, value)
+        if b == len(self.blocks):
+            return self.size
+        return self._index()[b] + bisect_left(self.blocks[b], value)
+
+    def count(self, value: int) -> int:
+        # Number of occurrences of value.
+        return self.rank_right(value) - self.rank(value)
+
+    def rank_right(self, value: int) -> int:
+        # Number of values less than or equal to value.
+        b = bisect_right(self.maxes, value)
+        if b == len(self.blocks):
+            return self.size
+        return self._index()[b] + bisect_right(self.blocks[b], value)
+
+    def slice(self, start: int, stop: int) -> List[int]:
+        # Values at sorted positions [start, stop), clamped to the collection.
+        start, stop = max(start, 0), min(stop, self.size)
+        if start >= stop:
+            return []
+        offsets = self._index()
+        b = bisect_right(offsets, start) - 1
+        out = []
+        i = start - offsets[b]
+        while len(out) < stop - start:
+            out.extend(self.blocks[b][i:i + stop - start - len(out)])
+            b, i = b + 1, 0
+        return out
+
+    def range(self, lo: int, hi: int, limit: Optional[int] = None) -> List[int]:
+        # Values v with lo <= v <= hi in order, at most `limit` of them.
+        start, stop = self.rank(lo), self.rank_right(hi)
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return self.slice(start, stop)
+
+
+class CollectionStore:
+    # This class defines the structure and logic for CollectionStore
+    """
+    Collection Store: In-process sessions of SortedCollection keyed by random IDs. Sessions are kept
+    in LRU order. Past `max_sessions`, or past `max_items` values across all sessions, the least
+    recently used ones are dropped. A single collection may not exceed `max_items`. Every change
+    and query goes through one lock, since sync endpoints run in FastAPI's threadpool; callers
+    use the methods below rather than reading a collection returned by get() unlocked.
+    """
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS, max_items: int = DEFAULT_MAX_ITEMS,
+                 load: int = DEFAULT_LOAD):
+        # Initializes the class instance with necessary attributes.
+        self.max_sessions = max_sessions
+        self.max_items = max_items
+        self.load = load
+        self.sessions: "OrderedDict[str, SortedCollection]" = OrderedDict()
+        self.items = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+
+    def create(self, values: Optional[List[int]] = None) -> str:
+        # Starts a session holding values and returns its ID.
+        values = values or []
+        self._check_size(len(values))
+        with self.lock:
+            cid = uuid.uuid4().hex
+            self.sessions[cid] = SortedCollection(values, self.load)
+            self.items += len(values)
+            self._evict(keep=cid)
+            return cid
+
+    def get(self, cid: str) -> SortedCollection:
+        # Returns a session and marks it recently used; raises KeyError if it is unknown or evicted.
+        # Only safe to read while holding the lock.
+        with self.lock:
+            collection = self.sessions[cid]
+            self.sessions.move_to_end(cid)
+            return collection
+
+    def insert(self, cid: str, values: List[int]) -> Dict:
+        # Adds values to a session, enforcing the size cap; returns its summary().
+        with self.lock:
+            collection = self.get(cid)
+            self._check_size(len(collection) + len(values))
+            if len(values) == 1:
+                collection.add(values[0])
+            else:
+                collection.update(values)
+            self.items += len(values)
+            self._evict(keep=cid)
+            return self.summary(cid)
+
+    def remove(self, cid: str, value: int) -> Dict:
+        # Deletes one occurrence of value from a session; returns its summary().
+        with self.lock:
+            collection = self.get(cid)
+            collection.remove(value)
+            self.items -= 1
+            return self.summary(cid)
+
+    def summary(self, cid: str) -> Dict:
+        # ID and size of a session.
+        with self.lock:
+            return {'id': cid, 'size': len(self.get(cid))}
+
+    def slice(self, cid: str, start: int, stop: int) -> Dict:
+        # summary() plus the values at sorted positions [start, stop).
+        with self.lock:
+            return {**self.summary(cid), 'values': self.get(cid).slice(start, stop)}
+
+    def rank(self, cid: str, value: int) -> Dict:
+        # Rank and count of value in a session, with its size.
+        with self.lock:
+            collection = self.get(cid)
+            return {'value': value, 'rank': collection.rank(value), 'count': collection.count(value),
+                    'size': len(collection)}
+
+    def range(self, cid: str, lo: int, hi: int, limit: Optional[int] = None) -> Dict:
+        # Values v with lo <= v <= hi in a session, at most `limit` of them.
+        with self.lock:
+            return {'lo': lo, 'hi': hi, 'values': self.get(cid).range(lo, hi, limit)}
+
+    def drop(self, cid: str):
+        # Ends a session.
+        with self.lock:
+            self.items -= len(self.sessions.pop(cid))
+
+    def _check_size(self, size: int):
+        # Rejects collections larger than max_items.
+        if size > self.max_items:
+            raise ValueError(f"Collection would hold {size} values (limit {self.max_items})")
+
+    def _evict(self, keep: str):
+        # Drops least recently used sessions (never `keep`) past the session or item budget.
+        while len(self.sessions) > self.max_sessions or self.items > self.max_items:
+            cid = next(iter(self.sessions))
+            if cid == keep:
+                break
+            self.items -= len(self.sessions.pop(cid))
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        # Session counts and usage.
+        with self.lock:
+            return {
+                'sessions': len(self.sessions),
+                'items': self.items,
+                'max_sessions': self.max_sessions,
+                'max_items': self.max_items,
+                'evictions': self.evictions
+            }
@@ -42,47 +42,53 @@ def merge_sort(arr: List[int]) -> Dict:
         # Executes the sorting algorithm and tracks steps for visualization.
     steps = []
     comparisons = 0
+    result = arr.copy()
+    aux = [None] * len(result)
 
-    def merge(left, right):
-        # Merges two sorted lists during merge sort.
+    def merge(lo, mid, hi):
+        # Merges result[lo:mid] and result[mid:hi] through the shared aux buffer.
         nonlocal comparisons
-        result = []
-        while left and right:
+        aux[lo:hi] = result[lo:hi]
+        i, j, k = lo, mid, lo
+        while i < mid and j < hi:
             comparisons += 1
-            l_val, r_val = left[0], right[0]
+            l_val, r_val = aux[i], aux[j]
             steps.append({
                 'type': 'compare',
+                'indices': [i, j],
                 'values': [l_val, r_val],
                 'explanation': f'Compare left value {l_val} with right value {r_val}'
             })
             if l_val <= r_val:
-                result.append(left.pop(0))
+                result[k] = l_val
+                i += 1
             else:
-                result.append(right.pop(0))
-        result += left or right
-        return result
+                result[k] = r_val
+                j += 1
+            k += 1
+        result[k:k + mid - i] = aux[i:mid]
 
-    def divide(lst):
-        # Recursively divides the list for merge sort.
-        if len(lst) <= 1:
-            return lst
-        mid = len(lst) // 2
-        left = divide(lst[:mid])
-        right = divide(lst[mid:])
-        merged = merge(left, right)
+    def divide(lo, hi):
+        # Recursively divides the range for merge sort.
+        if hi - lo <= 1:
+            return
+        mid = lo + (hi - lo) // 2
+        divide(lo, mid)
+        divide(mid, hi)
+        merge(lo, mid, hi)
         steps.append({
             'type': 'merge',
-            'explanation': f'Merge step result: {merged}'
+            'range': [lo, hi],
+            'explanation': f'Merge indices {lo}-{mid - 1} with {mid}-{hi - 1}'
         })
-        return merged
 
     start_time = time.time()
-    sorted_arr = divide(arr.copy())
+    divide(0, len(result))
     end_time = time.time()
 
     return {
         'steps': steps,
-        'sorted': sorted_arr,
+        'sorted': result,
         'metrics': {
             'comparisons': comparisons,
             'swaps': 'N/A',
@@ -0,0 +1,205 @@
+from typing import List, Dict, Generator, Tuple
+from .base import SortingAlgorithm
+from .trace import changes
+
+MIN_MERGE = 32
+MIN_GALLOP = 7
+
+
+def min_run_length(n: int) -> int:
+    # Picks a minimum run length in [16, 32] so n / minrun is close to a power of two.
+    r = 0
+    while n >= MIN_MERGE:
+        r |= n & 1
+        n >>= 1
+    return n + r
+
+
+class TimSort(SortingAlgorithm):
+    # This class defines the structure and logic for TimSort
+    """
+    Tim Sort: Splits the array into natural ascending (or strictly descending, then reversed) runs,
+    extends short runs to `minrun` with binary insertion sort, and merges runs from a stack that keeps
+    run lengths balanced. Merges switch to galloping (exponential search plus bulk copy) when one run
+    keeps winning, so nearly-sorted input sorts in close to linear time.
+    """
+    def generate(self, arr: List[int]) -> Generator[Dict, None, Tuple[List[int], Dict]]:
+        # Executes the sorting algorithm and yields steps for visualization.
+        return (yield from self.timsort(arr, True))
+
+    def sort_untraced(self, arr: List[int]) -> Tuple[List[int], Dict]:
+        # With trace=False timsort() never yields, so this runs it to completion in one next() call.
+        run = self.timsort(arr, False)
+        try:
+            next(run)
+        except StopIteration as stop:
+            return stop.value
+
+    def timsort(self, arr: List[int], trace: bool) -> Generator[Dict, None, Tuple[List[int], Dict]]:
+        # Sorts arr in place; steps are only built and yielded when trace is True.
+        n = len(arr)
+        comparisons = 0
+        min_gallop = MIN_GALLOP
+        aux = [None] * n
+        runs = []
+
+        def gallop(seq, key, base, length, right):
+        # Counts the leading elements of seq[base:base + length] that sort before key
+        # (<= key when right is True, < key otherwise) with exponential then binary search.
+            nonlocal comparisons
+            lo, hi = 0, length
+            ofs = 1
+            while ofs <= length:
+                comparisons += 1
+                value = seq[base + ofs - 1]
+                if value <= key if right else value < key:
+                    lo = ofs
+                    ofs *= 2
+                else:
+                    hi = ofs - 1
+                    break
+            while lo < hi:
+                mid = (lo + hi) // 2
+                comparisons += 1
+                value = seq[base + mid]
+                if value <= key if right else value < key:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return lo
+
+        def count_run(lo):
+        # Returns the length of the natural run starting at lo, reversing it if it descends.
+            nonlocal comparisons
+            hi = lo + 1
+            if hi == n:
+                return 1
+            comparisons += 1
+            if trace:
+                yield {'type': 'compare', 'indices': [lo, hi], 'explanation': f'Compare {arr[lo]} with {arr[hi]} to find the run direction'}
+            descending = arr[hi] < arr[lo]
+            hi += 1
+            while hi < n:
+                comparisons += 1
+                if trace:
+                    yield {'type': 'compare', 'indices': [hi - 1, hi], 'explanation': f'Compare {arr[hi - 1]} with {arr[hi]} to extend the run'}
+                if (arr[hi] < arr[hi - 1]) != descending:
+                    break
+                hi += 1
+            if descending:
+                arr[lo:hi] = arr[lo:hi][::-1]
+            if trace:
+                step = {'type': 'run', 'range': [lo, hi], 'explanation': f'Found {"descending" if descending else "ascending"} run at indices {lo}-{hi - 1}'}
+                if descending:
+                    step['changes'] = changes(arr, range(lo, hi))
+                    step['explanation'] += ', reversed it'
+                yield step
+            return hi - lo
+
+        def binary_insertion(lo, hi, start):
+        # Extends the sorted run arr[lo:start] to arr[lo:hi] with binary insertion.
+            for i in range(start, hi):
+                key = arr[i]
+                pos = lo + gallop(arr, key, lo, i - lo, True)
+                arr[pos + 1:i + 1] = arr[pos:i]
+                arr[pos] = key
+                if trace:
+                    yield {'type': 'insert', 'indices': [pos], 'changes': changes(arr, range(pos, i + 1)), 'explanation': f'Insert {key} at position {pos}'}
+
+        def merge_at(r):
+        # Merges runs r and r + 1 of the run stack.
+            nonlocal comparisons, min_gallop
+            base1, len1 = runs[r]
+            base2, len2 = runs[r + 1]
+            runs[r] = (base1, len1 + len2)
+            del runs[r + 1]
+            end = base2 + len2
+
+            # Leading elements of run 1 and trailing elements of run 2 are already in place.
+            skip = gallop(arr, arr[base2], base1, len1, True)
+            base1 += skip
+            len1 -= skip
+            if len1 == 0:
+                return
+            len2 = gallop(arr, arr[base1 + len1 - 1], base2, len2, False)
+            if len2 == 0:
+                return
+            end = base2 + len2
+
+            aux[:len1] = arr[base1:base2]
+            i, j, k = 0, base2, base1
+            while i < len1 and j < end:
+                wins1 = wins2 = 0
+                while i < len1 and j < end:
+                    comparisons += 1
+                    if trace:
+                        yield {'type': 'compare', 'values': [aux[i], arr[j]], 'explanation': f'Compare left value {aux[i]} with right value {arr[j]}'}
+                    if arr[j] < aux[i]:
+                        arr[k] = arr[j]
+                        j += 1
+                        wins2 += 1
+                        wins1 = 0
+                    else:
+                        arr[k] = aux[i]
+                        i += 1
+                        wins1 += 1
+                        wins2 = 0
+                    k += 1
+                    if wins1 >= min_gallop or wins2 >= min_gallop:
+                        break
+                while i < len1 and j < end:
+                    copied1 = gallop(aux, arr[j], i, len1 - i, True)
+                    arr[k:k + copied1] = aux[i:i + copied1]
+                    k += copied1
+                    i += copied1
+                    if i == len1:
+                        break
+                    copied2 = gallop(arr, aux[i], j, end - j, False)
+                    arr[k:k + copied2] = arr[j:j + copied2]
+                    k += copied2
+                    j += copied2
+                    if trace:
+                        yield {'type': 'gallop', 'values': [copied1, copied2], 'explanation': f'Gallop: copy {copied1} left and {copied2} right values in bulk'}
+                    if copied1 < MIN_GALLOP and copied2 < MIN_GALLOP:
+                        min_gallop += 1
+                        break
+                    min_gallop = max(1, min_gallop - 1)
+            arr[k:k + len1 - i] = aux[i:len1]
+            if trace:
+                yield {
+                    'type': 'merge',
+                    'range': [base1, end],
+                    'changes': changes(arr, range(base1, end)),
+                    'explanation': f'Merge runs at indices {base1}-{base2 - 1} and {base2}-{end - 1}'
+                }
+
+        def merge_collapse():
+        # Merges runs until the stack lengths satisfy the Timsort invariants.
+            while len(runs) > 1:
+                r = len(runs) - 2
+                if (r > 0 and runs[r - 1][1] <= runs[r][1] + runs[r + 1][1]) or \
+                        (r > 1 and runs[r - 2][1] <= runs[r - 1][1] + runs[r][1]):
+                    if runs[r - 1][1] < runs[r + 1][1]:
+                        r -= 1
+                elif runs[r][1] > runs[r + 1][1]:
+                    break
+                yield from merge_at(r)
+
+        minrun = min_run_length(n)
+        lo = 0
+        while lo < n:
+            run_len = yield from count_run(lo)
+            if run_len < minrun:
+                forced = min(minrun, n - lo)
+                yield from binary_insertion(lo, lo + forced, lo + run_len)
+                run_len = forced
+            runs.append((lo, run_len))
+            yield from merge_collapse()
+            lo += run_len
+        while len(runs) > 1:
+            r = len(runs) - 2
+            if r > 0 and runs[r - 1][1] < runs[r + 1][1]:
+                r -= 1
+            yield from merge_at(r)
+
+        return arr, {'comparisons': comparisons, 'swaps': 'N/A'}
@@ -0,0 +1,220 @@
+from typing import List, Dict, Optional
+
+TRACE_FORMATS = ('delta', 'full')
+KEYFRAME_INTERVAL = 100
+SAMPLING_STRATEGIES = ('all', 'every_kth', 'swaps_only', 'merge_level')
+STRUCTURAL_STEPS = ('merge', 'run')
+
+
+def changes(arr: List[int], indices: List[int]) -> List[List[int]]:
+    # Builds the [index, value] pairs a mutating step wrote to the array.
+    return [[i, arr[i]] for i in indices]
+
+
+class TraceRecorder:
+    # This class defines the structure and logic for TraceRecorder
+    """
+    Trace Recorder: Formats the visualization steps of a single sort run as they are produced.
+    Mutating steps only need to carry 'changes' ([index, value] pairs). In 'delta' format every
+    `keyframe_interval`-th mutating step also carries a full 'array' snapshot so clients can seek;
+    in 'full' format every mutating step carries the snapshot, which is what VisualBars expects.
+    """
+    def __init__(self, arr: List[int], trace_format: str = 'delta', keyframe_interval: int = KEYFRAME_INTERVAL):
+        # Initializes the class instance with necessary attributes.
+        if trace_format not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format: {trace_format}")
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be at least 1")
+        self.trace_format = trace_format
+        self.keyframe_interval = keyframe_interval
+        self.shadow = list(arr)
+        self.mutations = 0
+
+    def record(self, step: Dict) -> Dict:
+        # Applies the step's changes to the shadow array and returns it in the requested format.
+        step_changes = step.get('changes')
+        if step_changes:
+            for index, value in step_changes:
+                self.shadow[index] = value
+            self.mutations += 1
+            if self.trace_format == 'full':
+                del step['changes']
+                step['array'] = self.shadow.copy()
+            elif self.mutations % self.keyframe_interval == 0:
+                step['array'] = self.shadow.copy()
+        return step
+
+
+class TraceOptions:
+    # This class defines the structure and logic for TraceOptions
+    """
+    Trace Options: Which recorded steps reach the client. `sampling` picks steps: 'all', 'every_kth'
+    (every `every`-th step), 'swaps_only' (steps that write the array) or 'merge_level' (merge and run
+    steps). `max_steps` then thins the result evenly to at most that many steps, and `offset`/`limit`
+    select a window of it.
+    """
+    def __init__(self, sampling: str = 'all', every: int = 1, max_steps: Optional[int] = None,
+                 offset: int = 0, limit: Optional[int] = None):
+        # Initializes the class instance with necessary attributes.
+        if sampling not in SAMPLING_STRATEGIES:
+            raise ValueError(f"Unknown sampling strategy: {sampling}")
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        if max_steps is not None and max_steps < 1:
+            raise ValueError("max_steps must be at least 1")
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("offset and limit must not be negative")
+        self.sampling = sampling
+        self.every = every if sampling == 'every_kth' else 1
+        self.max_steps = max_steps
+        self.offset = offset
+        self.limit = limit
+
+    def is_default(self) -> bool:
+        # True when every step is kept, i.e. the plain trace.
+        return self.sampling == 'all' and self.max_steps is None and self.offset == 0 and self.limit is None
+
+    def as_dict(self) -> Dict:
+        # The options as a plain dict (cache keys, stored traces, response metadata).
+        return {'sampling': self.sampling, 'every': self.every, 'max_steps': self.max_steps,
+                'offset': self.offset, 'limit': self.limit}
+
+
+class TraceSampler:
+    # This class defines the structure and logic for TraceSampler
+    """
+    Trace Sampler: Applies TraceOptions to the steps coming out of a TraceRecorder. Nothing is lost
+    for reconstruction. In 'delta' format the changes of dropped steps are folded into the next kept
+    step; in 'full' format a kept step that writes nothing takes the latest dropped snapshot. With
+    `max_steps` it buffers at most that many steps and doubles its stride whenever the buffer
+    overflows, merging neighbours pairwise, so the full trace is never materialized. Without it, a
+    window is emitted as it is reached, and `full` tells the caller to stop recording once a kept
+    step past the window shows that more exist.
+    """
+    def __init__(self, arr: List[int], trace_format: str, options: TraceOptions):
+        # Initializes the class instance with necessary attributes.
+        self.trace_format = trace_format
+        self.options = options
+        self.state = list(arr)
+        self.seen = 0
+        self.selected = 0
+        self.emitted = 0
+        self.stride = 1
+        self.buffer: List[Dict] = []
+        self.carry: Optional[Dict] = None
+        self.full = False
+
+    def selects(self, step: Dict) -> bool:
+        # The sampling strategy's verdict on one recorded step.
+        sampling = self.options.sampling
+        if sampling == 'every_kth':
+            return self.seen % self.options.every == 0
+        if sampling == 'swaps_only':
+            return 'changes' in step or 'array' in step
+        if sampling == 'merge_level':
+            return step['type'] in STRUCTURAL_STEPS
+        return True
+
+    def absorb(self, earlier: Dict, later: Dict) -> Dict:
+        # Folds a dropped step into the kept step after it, so `later` still leads to the right state.
+        if 'changes' in earlier:
+            merged = dict(earlier['changes'])
+            merged.update(later.get('changes', ()))
+            later['changes'] = [[i, v] for i, v in merged.items()]
+        if 'array' in earlier and 'array' not in later and (self.trace_format == 'full' or 'changes' not in later):
+            later['array'] = earlier['array']
+        return later
+
+    def drop(self, step: Dict):
+        # Remembers a dropped step until the next kept one.
+        self.carry = step if self.carry is None else self.absorb(self.carry, step)
+
+    def push(self, step: Dict) -> List[Dict]:
+        # Takes one recorded step and returns the steps that can be emitted now.
+        self.seen += 1
+        if not self.selects(step):
+            self.drop(step)
+            return []
+        if self.carry is not None:
+            step = self.absorb(self.carry, step)
+            self.carry = None
+        if self.options.max_steps is None:
+            return self.window(step)
+        self.selected += 1
+        if self.selected % self.stride:
+            self.drop(step)
+            return []
+        self.buffer.append(step)
+        if len(self.buffer) > self.options.max_steps:
+            self.stride *= 2
+            pairs = self.buffer
+            self.buffer = [self.absorb(pairs[i], pairs[i + 1]) for i in range(0, len(pairs) - 1, 2)]
+            if len(pairs) % 2:
+                self.drop(pairs[-1])
+        return []
+
+    def finish(self) -> List[Dict]:
+        # Flushes buffered steps and a trailing dropped step, so the last kept state is the final one.
+        out = []
+        if self.options.max_steps is not None:
+            if self.carry is not None and len(self.buffer) >= self.options.max_steps:
+                # No room for one more step: the trailing dropped step replaces the last kept one.
+                self.buffer[-1] = self.absorb(self.buffer[-1], self.carry)
+                self.carry = None
+            for step in self.buffer:
+                out.extend(self.window(step))
+            self.buffer = []
+        if self.carry is not None and ('changes' in self.carry or 'array' in self.carry):
+            out.extend(self.window(self.carry))
+        self.carry = None
+        return out
+
+    def window(self, step: Dict) -> List[Dict]:
+        # Applies offset/limit; the first step of a later window carries a full snapshot to start from.
+        index = self.emitted
+        self.emitted += 1
+        for i, value in step.get('changes', ()):
+            self.state[i] = value
+        if 'array' in step:
+            self.state = list(step['array'])
+        limit = self.options.limit
+        if index < self.options.offset or self.full:
+            return []
+        if limit is not None and index >= self.options.offset + limit:
+            self.full = self.options.max_steps is None
+            return []
+        if index == self.options.offset and index > 0 and 'array' not in step:
+            step['array'] = self.state.copy()
+        return [step]
+
+    def summary(self, complete: bool) -> Dict:
+        # Describes the sampled window for the response.
+        offset, limit = self.options.offset, self.options.limit
+        end = self.emitted if limit is None else min(self.emitted, offset + limit)
+        info = {**self.options.as_dict(), 'stride': self.stride, 'returned': max(end - offset, 0)}
+        if complete:
+            info['total'] = self.emitted
+            info['has_more'] = end < self.emitted
+        else:
+            info['has_more'] = True
+        info['next_offset'] = end if info['has_more'] else None
+        return info
+
+
+def reconstruct(initial: List[int], steps: List[Dict], index: Optional[int] = None) -> List[int]:
+    # Rebuilds the array as it was after steps[index] (the final state when index is None).
+    if index is None:
+        index = len(steps) - 1
+    if index >= len(steps):
+        raise IndexError(f"Step index {index} out of range for a trace of {len(steps)} steps")
+    start = 0
+    state = list(initial)
+    for k in range(index, -1, -1):
+        if 'array' in steps[k]:
+            state = list(steps[k]['array'])
+            start = k + 1
+            break
+    for step in steps[start:index + 1]:
+        for i, value in step.get('changes', ()):
+            state[i] = value
+    return state
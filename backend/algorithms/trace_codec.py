@@ -0,0 +1,187 @@
+from typing import List, Dict
+from array import array
+from itertools import islice
+import json
+import struct
+import sys
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; only the JSON and columnar encodings are then offered.
+    msgpack = None
+
+JSON_MEDIA_TYPE = 'application/json'
+BINARY_MEDIA_TYPE = 'application/x-sort-trace'
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+MAGIC = b'SRT2'
+HEADER = struct.Struct('<4s9I')
+OPCODES = ('compare', 'swap', 'insert', 'merge', 'run', 'gallop', 'bucket')
+OPCODE_OF = {name: code for code, name in enumerate(OPCODES)}
+FIELDS = ('indices', 'range', 'values', 'changes', 'array')
+HAS_INDICES, HAS_RANGE, HAS_VALUES, HAS_CHANGES, HAS_ARRAY = (1 << bit for bit in range(len(FIELDS)))
+U32 = 'I' if array('I').itemsize == 4 else 'L'
+
+
+def _pack(column: array) -> bytes:
+    # Little-endian bytes of an array column.
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _unpack(typecode: str, data: memoryview, offset: int, count: int):
+    # Reads `count` little-endian items of `typecode` at offset; returns (column, new offset).
+    column = array(typecode)
+    end = offset + count * column.itemsize
+    column.frombytes(data[offset:end])
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column, end
+
+
+def encode_binary(result: Dict) -> bytes:
+    # Packs a sort result into the columnar layout: one opcode and one field bitmask per step,
+    # then flat index/range/value/change/keyframe columns and a JSON tail with the metrics (plus the
+    # 'trace' summary of sampled results). Explanations are dropped; clients rebuild them from the
+    # opcodes. Raises OverflowError for values outside int64.
+    steps = result['steps']
+    opcodes, fields = array('B'), array('B')
+    index_counts, indices, ranges = array('B'), array(U32), array(U32)
+    value_counts, values = array('B'), array('q')
+    change_counts, change_indices, change_values = array(U32), array(U32), array('q')
+    keyframes = array('q')
+    for step in steps:
+        try:
+            opcodes.append(OPCODE_OF[step['type']])
+        except KeyError:
+            # An algorithm emitted a step this layout does not know: a server bug, not bad input.
+            raise RuntimeError(f"Step type {step['type']!r} has no binary opcode")
+        mask = 0
+        if 'indices' in step:
+            mask |= HAS_INDICES
+            index_counts.append(len(step['indices']))
+            indices.extend(step['indices'])
+        if 'range' in step:
+            mask |= HAS_RANGE
+            ranges.extend(step['range'])
+        if 'values' in step:
+            mask |= HAS_VALUES
+            value_counts.append(len(step['values']))
+            values.extend(step['values'])
+        if 'changes' in step:
+            mask |= HAS_CHANGES
+            change_counts.append(len(step['changes']))
+            for index, value in step['changes']:
+                change_indices.append(index)
+                change_values.append(value)
+        if 'array' in step:
+            mask |= HAS_ARRAY
+            keyframes.extend(step['array'])
+        fields.append(mask)
+
+    sorted_column = array('q', result['sorted'])
+    tail = json.dumps({key: result[key] for key in ('metrics', 'trace') if key in result},
+                      separators=(',', ':')).encode()
+    header = HEADER.pack(
+        MAGIC, len(steps), len(index_counts), len(indices), len(ranges) // 2, len(value_counts),
+        len(values), len(change_counts), len(change_values), len(sorted_column)
+    )
+    return b''.join([
+        header, _pack(opcodes), _pack(fields), _pack(index_counts), _pack(indices), _pack(ranges),
+        _pack(value_counts), _pack(values), _pack(change_counts), _pack(change_indices),
+        _pack(change_values), _pack(keyframes), _pack(sorted_column), tail
+    ])
+
+
+def decode_binary(data: bytes) -> Dict:
+    # Inverse of encode_binary(); steps come back without explanations.
+    view = memoryview(data)
+    magic, n_steps, n_index_steps, n_indices, n_ranges, n_value_steps, n_values, n_change_steps, \
+        n_changes, n_sorted = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not a binary sort trace")
+    offset = HEADER.size
+    opcodes, offset = _unpack('B', view, offset, n_steps)
+    fields, offset = _unpack('B', view, offset, n_steps)
+    index_counts, offset = _unpack('B', view, offset, n_index_steps)
+    indices, offset = _unpack(U32, view, offset, n_indices)
+    ranges, offset = _unpack(U32, view, offset, 2 * n_ranges)
+    value_counts, offset = _unpack('B', view, offset, n_value_steps)
+    values, offset = _unpack('q', view, offset, n_values)
+    change_counts, offset = _unpack(U32, view, offset, n_change_steps)
+    change_indices, offset = _unpack(U32, view, offset, n_changes)
+    change_values, offset = _unpack('q', view, offset, n_changes)
+    n_keyframes = sum(1 for mask in fields if mask & HAS_ARRAY)
+    keyframes, offset = _unpack('q', view, offset, n_keyframes * n_sorted)
+    sorted_column, offset = _unpack('q', view, offset, n_sorted)
+    tail = json.loads(bytes(view[offset:]))
+
+    index_counts, indices, ranges = iter(index_counts), iter(indices), iter(ranges)
+    value_counts, values = iter(value_counts), iter(values)
+    change_counts, changes = iter(change_counts), zip(change_indices, change_values)
+    keyframes = iter(keyframes)
+    steps = []
+    for opcode, mask in zip(opcodes, fields):
+        step = {'type': OPCODES[opcode]}
+        if mask & HAS_INDICES:
+            step['indices'] = list(islice(indices, next(index_counts)))
+        if mask & HAS_RANGE:
+            step['range'] = list(islice(ranges, 2))
+        if mask & HAS_VALUES:
+            step['values'] = list(islice(values, next(value_counts)))
+        if mask & HAS_CHANGES:
+            step['changes'] = [list(pair) for pair in islice(changes, next(change_counts))]
+        if mask & HAS_ARRAY:
+            step['array'] = list(islice(keyframes, n_sorted))
+        steps.append(step)
+    return {'steps': steps, 'sorted': sorted_column.tolist(), **tail}
+
+
+def encode_msgpack(result: Dict) -> bytes:
+    # msgpack form of the result with explanations dropped, like the columnar layout.
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+    steps = [{key: value for key, value in step.items() if key != 'explanation'} for step in result['steps']]
+    return msgpack.packb({**result, 'steps': steps})
+
+
+def encode_json(result: Dict) -> bytes:
+    # The default JSON body.
+    return json.dumps(result, separators=(',', ':')).encode()
+
+
+ENCODERS = {JSON_MEDIA_TYPE: encode_json, BINARY_MEDIA_TYPE: encode_binary}
+if msgpack is not None:
+    ENCODERS[MSGPACK_MEDIA_TYPE] = encode_msgpack
+
+
+def quality(params: List[str]) -> float:
+    # The q value among an Accept entry's parameters (1 when absent or malformed).
+    for param in params:
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'q':
+            try:
+                return float(value)
+            except ValueError:
+                return 1.0
+    return 1.0
+
+
+def negotiate(accept: str) -> str:
+    # Picks the response media type from an Accept header by descending q value (ties keep header
+    # order), defaulting to JSON; q=0 marks a type as not acceptable.
+    offers = []
+    for position, part in enumerate((accept or '').split(',')):
+        media_type, *params = part.split(';')
+        offers.append((-quality(params), position, media_type.strip().lower()))
+    for q, _, media_type in sorted(offers):
+        if q < 0 and media_type in ENCODERS:
+            return media_type
+    return JSON_MEDIA_TYPE
+
+
+def encode(result: Dict, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    # Serializes a result for the given media type.
+    return ENCODERS[media_type](result)
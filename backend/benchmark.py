@@ -0,0 +1,185 @@
+# benchmark.py
+"""
+Benchmark every algorithm registered in SortManager across input distributions and sizes.
+
+    python benchmark.py --sizes 100 1000 10000 --trials 5 --output results.json
+    python benchmark.py --compare results.json --threshold 1.2
+
+Each case is timed with perf_counter_ns over repeated untraced runs after warm-ups. A separate run
+under tracemalloc (for sizes up to --memory-max-size, since tracing allocations is far slower than
+the timed runs) records the peak memory, and one traced run (for sizes up to --trace-max-size)
+records the number of steps and the size and encoding time of the JSON and binary responses.
+Results are written as JSON so two runs can be diffed; --compare reports cases whose median time
+regressed past --threshold and exits with 1.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from algorithms.sort_manager import SortManager
+from algorithms.numpy_sort import HAS_NUMPY
+from algorithms.trace_codec import JSON_MEDIA_TYPE, BINARY_MEDIA_TYPE, encode
+from sort_pool import QUADRATIC_ALGORITHMS, QUADRATIC_CASES
+
+DISTRIBUTIONS = ("random", "sorted", "reversed", "nearly_sorted", "few_unique", "organ_pipe")
+
+
+def is_quadratic(algo: str, distribution: str) -> bool:
+    # True when the algorithm runs in quadratic time on this distribution.
+    return algo in QUADRATIC_ALGORITHMS or distribution in QUADRATIC_CASES.get(algo, ())
+
+
+def make_input(distribution: str, size: int, rng: random.Random) -> List[int]:
+    # Builds one input array of the given distribution.
+    if distribution == "random":
+        return [rng.randint(-size, size) for _ in range(size)]
+    if distribution == "sorted":
+        return list(range(size))
+    if distribution == "reversed":
+        return list(range(size, 0, -1))
+    if distribution == "nearly_sorted":
+        data = list(range(size))
+        for _ in range(max(1, size // 100)):
+            i, j = rng.randrange(size), rng.randrange(size)
+            data[i], data[j] = data[j], data[i]
+        return data
+    if distribution == "few_unique":
+        return [rng.randrange(10) for _ in range(size)]
+    if distribution == "organ_pipe":
+        half = size // 2
+        return list(range(half)) + list(range(size - half, 0, -1))
+    raise ValueError(f"Unknown distribution: {distribution}")
+
+
+def bench_case(manager: SortManager, algo: str, data: List[int], trials: int, warmup: int,
+               trace_max_size: int, memory_max_size: int = 2000) -> Dict:
+    # Times one (algorithm, input) pair and measures its memory peak and trace size.
+    algorithm = manager.get(algo)
+    for _ in range(warmup):
+        algorithm.sort(list(data), trace=False)
+
+    times = []
+    result = None
+    for _ in range(trials):
+        arr = list(data)
+        start = time.perf_counter_ns()
+        result = algorithm.sort(arr, trace=False)
+        times.append(time.perf_counter_ns() - start)
+
+    median = statistics.median(times)
+    case = {
+        "time_ns": {"min": min(times), "median": median, "mean": statistics.mean(times)},
+        "throughput_per_s": round(len(data) / (median / 1e9), 1) if median else None,
+        "comparisons": result["metrics"]["comparisons"],
+        "swaps": result["metrics"]["swaps"],
+        "engine": result["metrics"].get("engine", "python"),
+    }
+    if len(data) <= memory_max_size:
+        tracemalloc.start()
+        algorithm.sort(list(data), trace=False)
+        case["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    if len(data) <= trace_max_size:
+        traced = algorithm.sort(list(data))
+        case["steps"] = len(traced["steps"])
+        for name, media_type in (("json", JSON_MEDIA_TYPE), ("binary", BINARY_MEDIA_TYPE)):
+            start = time.perf_counter_ns()
+            body = encode(traced, media_type)
+            case[f"trace_{name}_encode_ns"] = time.perf_counter_ns() - start
+            case[f"trace_{name}_bytes"] = len(body)
+    return case
+
+
+def run(algorithms: Optional[List[str]] = None, distributions=DISTRIBUTIONS, sizes=(100, 1000),
+        trials: int = 5, warmup: int = 1, seed: int = 0, quadratic_max_size: int = 5000,
+        trace_max_size: int = 2000, memory_max_size: int = 2000) -> Dict:
+    # Runs the full matrix and returns a JSON-serializable report.
+    manager = SortManager()
+    algorithms = algorithms or list(manager.algorithms)
+    results = []
+    for size in sizes:
+        for distribution in distributions:
+            data = make_input(distribution, size, random.Random(f"{seed}:{distribution}:{size}"))
+            for algo in algorithms:
+                entry = {"algorithm": algo, "distribution": distribution, "size": size}
+                if is_quadratic(algo, distribution) and size > quadratic_max_size:
+                    entry["skipped"] = f"quadratic on {distribution} input above {quadratic_max_size} elements"
+                else:
+                    try:
+                        entry.update(bench_case(manager, algo, data, trials, warmup, trace_max_size,
+                                                memory_max_size))
+                    except (ValueError, RecursionError) as e:
+                        entry["skipped"] = str(e)
+                results.append(entry)
+                print(f"{algo:>16} {distribution:>13} {size:>8} "
+                      f"{entry.get('time_ns', {}).get('median', '-')}", file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": HAS_NUMPY,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "trials": trials,
+            "warmup": warmup,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    # Lists cases whose median time grew by more than threshold times relative to the baseline.
+    def key(entry):
+        return entry["algorithm"], entry["distribution"], entry["size"]
+
+    before = {key(e): e for e in baseline["results"] if "time_ns" in e}
+    regressions = []
+    for entry in report["results"]:
+        old = before.get(key(entry))
+        if old is None or "time_ns" not in entry or not old["time_ns"]["median"]:
+            continue
+        ratio = entry["time_ns"]["median"] / old["time_ns"]["median"]
+        if ratio > threshold:
+            regressions.append({"algorithm": entry["algorithm"], "distribution": entry["distribution"],
+                                "size": entry["size"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the registered sorting algorithms.")
+    parser.add_argument("--algorithms", nargs="+", help="names registered in SortManager (default: all)")
+    parser.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS), choices=DISTRIBUTIONS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000])
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quadratic-max-size", type=int, default=5000)
+    parser.add_argument("--trace-max-size", type=int, default=2000)
+    parser.add_argument("--memory-max-size", type=int, default=2000,
+                        help="largest size measured under tracemalloc (0 disables the memory pass)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args(argv)
+
+    report = run(args.algorithms, args.distributions, args.sizes, args.trials, args.warmup,
+                 args.seed, args.quadratic_max_size, args.trace_max_size, args.memory_max_size)
+    if args.compare:
+        with open(args.compare) as f:
+            report["regressions"] = compare(report, json.load(f), args.threshold)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
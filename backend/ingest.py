@@ -0,0 +1,90 @@
+# ingest.py
+import json
+import sys
+from array import array
+from typing import Dict, Tuple
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard json parser is used without it.
+    orjson = None
+
+JSON_MEDIA_TYPE = "application/json"
+INT64_MEDIA_TYPE = "application/x-int64"
+# Bodies above this size are parsed in the threadpool so a large array does not block the event loop.
+THREAD_PARSE_BYTES = 64 * 1024
+
+
+def decode_json(body: bytes):
+    # Parses a JSON body with orjson when it is installed; raises ValueError on malformed input.
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def to_buffer(values, allow_float: bool = False) -> array:
+    # Packs a decoded JSON list into array('q') in one pass. array()'s constructor performs the
+    # element type and int64 range check in C; with allow_float, non-integer numbers give array('d').
+    # Unlike Pydantic's list[int], integer-valued floats such as 1.0 are rejected.
+    if not isinstance(values, list):
+        raise ValueError("'array' must be a list of integers")
+    try:
+        return array("q", values)
+    except (TypeError, OverflowError):
+        if not allow_float:
+            raise ValueError(invalid_element(values))
+    try:
+        return array("d", values)
+    except (TypeError, OverflowError):
+        raise ValueError("'array' must be a list of numbers")
+
+
+def invalid_element(values) -> str:
+    # Explains why a list did not fit array('q'); only scanned once the fast path has failed.
+    # orjson parses integers beyond 64 bits as floats, so an integral float that large is out of range.
+    for value in values:
+        if type(value) is int and not -2 ** 63 <= value < 2 ** 63:
+            return "'array' values must fit in a signed 64-bit integer"
+        if type(value) is float and value.is_integer() and abs(value) >= 2 ** 63:
+            return "'array' values must fit in a signed 64-bit integer"
+        if type(value) not in (int, bool):
+            return f"'array' must be a list of integers, got {json.dumps(value)[:40]}"
+    return "'array' must be a list of integers"
+
+
+def decode_int64(body: bytes) -> array:
+    # Reads a raw little-endian int64 body straight into array('q').
+    if len(body) % 8:
+        raise ValueError("int64 body length must be a multiple of 8 bytes")
+    values = array("q")
+    values.frombytes(body)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def parse_array(body: bytes, content_type: str = JSON_MEDIA_TYPE, allow_float: bool = False) -> Tuple[array, Dict]:
+    # Decodes a request body into (values buffer, other JSON fields). Raw int64 bodies have no other
+    # fields; JSON bodies are objects with an 'array' list. Raises ValueError on invalid input.
+    media_type = (content_type or JSON_MEDIA_TYPE).split(";")[0].strip().lower()
+    if media_type == INT64_MEDIA_TYPE:
+        return decode_int64(body), {}
+    try:
+        data = decode_json(body)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON body: {e}")
+    if not isinstance(data, dict) or "array" not in data:
+        raise ValueError("Body must be a JSON object with an 'array' field")
+    return to_buffer(data.pop("array"), allow_float), data
+
+
+async def read_array(request: Request, allow_float: bool = False) -> Tuple[array, Dict]:
+    # parse_array() over the body of a FastAPI request.
+    body = await request.body()
+    content_type = request.headers.get("content-type", JSON_MEDIA_TYPE)
+    if len(body) > THREAD_PARSE_BYTES:
+        return await run_in_threadpool(parse_array, body, content_type, allow_float)
+    return parse_array(body, content_type, allow_float)
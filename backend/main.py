@@ -1,14 +1,42 @@
-from fastapi import FastAPI
+import json
+import time
+from itertools import chain
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse, Response, FileResponse, PlainTextResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 
 from algorithms.sort_manager import SortManager
-from ai_routes import router as ai_router
+from algorithms.result_cache import ResultCache
+from algorithms.trace_codec import negotiate
+from algorithms.trace import TraceOptions
+from algorithms.sorted_collection import CollectionStore
+from algorithms.external_sort import ExternalSort, BYTES_PER_ITEM
+from ai_routes import router as ai_router, suggestion_client
+from sort_pool import QUADRATIC_ALGORITHMS, QUADRATIC_CASES, SortPool, is_heavy, runs_in_process
+from algorithms.base import SortingAlgorithm
+from ingest import read_array
+from telemetry import (MetricsHook, MetricsMiddleware, ProfilingHook, PROMETHEUS_MEDIA_TYPE,
+                       record_sort, registry, sort_phase_duration)
 
 class Settings(BaseSettings):
     OPENROUTER_API_KEY: Optional[str] = None
+    SORT_WORKERS: Optional[int] = None
+    SORT_JOB_TIMEOUT: float = 30.0
+    SORT_CACHE_BYTES: int = 64 * 1024 * 1024
+    SORT_CACHE_PATH: Optional[str] = None
+    TRACE_STORE_BYTES: int = 16 * 1024 * 1024
+    SORT_PARALLEL_WORKERS: Optional[int] = None
+    PROFILE_SAMPLE_RATE: float = 0.0
+    COLLECTION_MAX_SESSIONS: int = 1024
+    COLLECTION_MAX_ITEMS: int = 1_000_000
+    EXTERNAL_SORT_MEMORY: int = 64 * 1024 * 1024
+    EXTERNAL_SORT_TMPDIR: Optional[str] = None
 
     class Config:
         env_file = ".env"
@@ -16,7 +44,26 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
-app = FastAPI()
+# Process pool for CPU-heavy sort jobs, started and stopped with the app.
+sort_pool = SortPool(settings.SORT_WORKERS, settings.SORT_JOB_TIMEOUT)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sort_pool.start()
+    await suggestion_client.start()
+    yield
+    await suggestion_client.close()
+    sort_pool.shutdown()
+    sort_manager.get("merge_parallel").shutdown()
+
+app = FastAPI(lifespan=lifespan)
+
+# Instrumentation: every in-process sort feeds the /metrics registry; a sample of sorts (or the
+# next N after POST /metrics/profile) also runs under cProfile.
+profiling_hook = ProfilingHook(settings.PROFILE_SAMPLE_RATE)
+SortingAlgorithm.add_hook(MetricsHook())
+SortingAlgorithm.add_hook(profiling_hook)
+app.add_middleware(MetricsMiddleware)
 
 # CORS configuration
 app.add_middleware(
@@ -32,15 +79,371 @@ app.add_middleware(
 def health():
     return {"status": "ok"}
 
-# Sorting endpoint
-sort_manager = SortManager()
+# Sorting endpoint; results are cached as serialized JSON so replays skip the sort entirely.
+sort_manager = SortManager(
+    cache=ResultCache(settings.SORT_CACHE_BYTES, settings.SORT_CACHE_PATH),
+    parallel_workers=settings.SORT_PARALLEL_WORKERS,
+    traces=ResultCache(settings.TRACE_STORE_BYTES),
+)
 
 class SortRequest(BaseModel):
     array: list[int]
 
-@app.post("/sort/{algorithm}")
-def sort_array(algorithm: str, request: SortRequest):
-    return sort_manager.sort(algorithm, request.array)
+class BatchSortRequest(BaseModel):
+    arrays: list[list[int]]
+    algorithms: list[str]
+    trace: bool = False
+    trace_format: Literal["delta", "full"] = "delta"
+    timeout: Optional[float] = None
+
+# Batch endpoint: every array is sorted with every algorithm in the process pool (untraced
+# merge_parallel jobs run in this process, which owns their worker pool); results come back in
+# request order (array-major) with per-job metrics or an error.
+@app.post("/sort/batch")
+async def sort_batch(request: BatchSortRequest):
+    unknown = [name for name in request.algorithms if name not in sort_manager.algorithms]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown algorithm: {', '.join(unknown)}")
+    if request.timeout is not None and request.timeout <= 0:
+        raise HTTPException(status_code=400, detail="timeout must be positive")
+    timeout = min(request.timeout or settings.SORT_JOB_TIMEOUT, settings.SORT_JOB_TIMEOUT)
+    jobs = [
+        {"array_index": i, "algorithm": name, "array": array,
+         "trace": request.trace, "trace_format": request.trace_format}
+        for i, array in enumerate(request.arrays)
+        for name in request.algorithms
+    ]
+    results = await sort_pool.map(jobs, timeout, local=sort_manager.sort)
+    # Hooks only see the jobs run in this process; pool jobs are recorded here from their metrics.
+    for job, result in zip(jobs, results):
+        if runs_in_process(job["algorithm"], job["trace"]):
+            continue
+        if "error" in result:
+            record_sort(job["algorithm"], len(job["array"]), job["trace"], None, {})
+        else:
+            record_sort(job["algorithm"], len(job["array"]), job["trace"], result,
+                        {"compute": result["metrics"]["time"]})
+    return {"results": [
+        {"array_index": job["array_index"], "algorithm": job["algorithm"], **result}
+        for job, result in zip(jobs, results)
+    ]}
+
+# Trace sampling: `sampling` keeps every step, every `every`-th step ("every_kth"), only steps that
+# write the array ("swaps_only") or only merge/run steps ("merge_level"); `max_steps` thins the
+# result evenly and `offset`/`limit` select a window. Dropped steps are folded into the next kept
+# one, so the sampled trace still reconstructs every kept state.
+def trace_options(
+    sampling: Literal["all", "every_kth", "swaps_only", "merge_level"] = "all",
+    every: int = 1,
+    max_steps: Optional[int] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> TraceOptions:
+    try:
+        return TraceOptions(sampling, every, max_steps, offset, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# OpenAPI description of the raw bodies read by read_array(), which bypass Pydantic.
+SORT_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "application/json": {"schema": {
+            "type": "object",
+            "required": ["array"],
+            "properties": {"array": {"type": "array", "items": {"type": "integer", "format": "int64"}}},
+        }},
+        "application/x-int64": {"schema": {"type": "string", "format": "binary",
+                                           "description": "Raw little-endian int64 values"}},
+    },
+}
+
+async def read_request_array(http_request: Request):
+    try:
+        array, _ = await read_array(http_request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid input: {e}")
+    return array
+
+async def sort_response(algorithm, array, media_type, trace_format, trace, options, trace_id=None):
+    try:
+        # Hashing the input and a possible SQLite read are blocking, so they leave the event loop too.
+        # A sampled trace hashes its input once; that hash keys both the cache and the trace ID.
+        # `trace_id` is given when the input is already stored under it (GET /traces/{id}).
+        sampled = trace and not options.is_default()
+        stored = trace_id is not None
+        if not sampled:
+            trace_id = None
+        elif not stored:
+            trace_id = await run_in_threadpool(sort_manager.input_key, algorithm, array, trace_format)
+        key, body = await run_in_threadpool(sort_manager.lookup, algorithm, array, trace_format, trace,
+                                            media_type, options, trace_id)
+        if body is None:
+            if is_heavy(algorithm, len(array), trace):
+                result = await sort_pool.submit(algorithm, array, trace_format, trace, options=options)
+                # Hooks run in the worker process, so pool jobs are recorded here from their metrics.
+                record_sort(algorithm, len(array), trace, result, {"compute": result["metrics"]["time"]})
+            else:
+                result = await run_in_threadpool(sort_manager.sort, algorithm, array, trace_format, trace, options)
+            # The input is stored once, on a miss; an input over TRACE_STORE_BYTES gets no ID.
+            if trace_id is not None and (stored or await run_in_threadpool(
+                    sort_manager.remember_trace, trace_id, algorithm, array, trace_format)):
+                result["trace"]["id"] = trace_id
+            serialize_start = time.perf_counter()
+            body = await run_in_threadpool(sort_manager.store, key, result, media_type)
+            sort_phase_duration.observe(time.perf_counter() - serialize_start, algorithm=algorithm, phase="serialize")
+        return Response(content=body, media_type=media_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+# trace_format="full" keeps a whole-array snapshot on every swap/insert step (used by VisualBars);
+# "delta" only sends the changed [index, value] pairs plus periodic keyframes.
+# trace=false skips step recording entirely and only returns "sorted" and "metrics".
+# Sampled or windowed traces (see trace_options) add a "trace" object with the window's position,
+# "has_more"/"next_offset" and an "id" for fetching later windows from GET /traces/{id}.
+# Heavy jobs run in the process pool (HTTP 504 past SORT_JOB_TIMEOUT); light ones in the threadpool.
+# The response encoding follows the Accept header: JSON by default, or the columnar binary trace
+# (application/x-sort-trace) / msgpack (application/msgpack), both without explanation strings.
+# The body is {"array": [...]} JSON (parsed with orjson when installed) or, with Content-Type
+# application/x-int64, raw little-endian int64 values. Either way it is decoded straight into an
+# array('q') with one C-level type and range check instead of per-element Pydantic validation.
+@app.post("/sort/{algorithm}", openapi_extra={"requestBody": SORT_REQUEST_BODY})
+async def sort_array(
+    algorithm: str,
+    http_request: Request,
+    trace_format: Literal["delta", "full"] = "delta",
+    trace: bool = True,
+    options: TraceOptions = Depends(trace_options),
+):
+    array = await read_request_array(http_request)
+    media_type = negotiate(http_request.headers.get("accept", ""))
+    return await sort_response(algorithm, array, media_type, trace_format, trace, options)
+
+# Later windows of a sampled trace: the input is kept under the trace ID (LRU, TRACE_STORE_BYTES),
+# so clients page with offset/limit without re-posting the array. The sort is re-run; it is
+# deterministic, and windows stop recording once a step past them shows that more exist.
+@app.get("/traces/{trace_id}")
+async def read_trace(trace_id: str, http_request: Request, options: TraceOptions = Depends(trace_options)):
+    try:
+        algorithm, array, trace_format = sort_manager.recall_trace(trace_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown or evicted trace: {trace_id}")
+    media_type = negotiate(http_request.headers.get("accept", ""))
+    return await sort_response(algorithm, array, media_type, trace_format, True, options, trace_id)
+
+# Prometheus text exposition: request latency and sizes by route, sort phase timings (compute,
+# trace, serialize), trace step counts and per-algorithm element/time counters for throughput.
+@app.get("/metrics")
+def metrics():
+    return Response(registry.render(), media_type=PROMETHEUS_MEDIA_TYPE)
+
+# cProfile on demand: POST arms profiling for the next `sorts` sorts, GET returns the accumulated
+# pstats report, DELETE clears it.
+@app.post("/metrics/profile")
+def arm_profile(sorts: int = 10):
+    profiling_hook.arm(sorts)
+    return {"armed": sorts}
+
+@app.get("/metrics/profile")
+def read_profile(limit: int = 30, sort_by: Literal["cumulative", "tottime", "calls"] = "cumulative"):
+    return PlainTextResponse(profiling_hook.report(limit, sort_by))
+
+@app.delete("/metrics/profile")
+def reset_profile():
+    profiling_hook.reset()
+    return {"reset": True}
+
+@app.get("/sort-cache/stats")
+def sort_cache_stats():
+    return sort_manager.cache.stats()
+
+# External sort: the request body is read as a stream (whitespace/comma-separated text, or raw
+# little-endian int64), so the upload never becomes a validated Python list. Runs of at most
+# EXTERNAL_SORT_MEMORY bytes are sorted with the chosen algorithm and spilled to temp files, then
+# k-way merged through mmap into a file that is sent back as a download and deleted afterwards.
+# Quadratic algorithms are rejected: a run holds up to a million values and is sorted in the
+# threadpool without a timeout. The quicksort variants that are O(n^2) on some distributions
+# (QUADRATIC_CASES) sort their runs with introsort instead, unless NumPy takes them.
+@app.post("/sort-file/{algorithm}")
+async def sort_file(
+    algorithm: str,
+    http_request: Request,
+    input_format: Literal["text", "int64"] = "text",
+    output: Literal["text", "int64"] = "text",
+):
+    if algorithm in QUADRATIC_ALGORITHMS:
+        raise HTTPException(status_code=400, detail=f"{algorithm} is too slow for external sorting; use an O(n log n) algorithm")
+    try:
+        engine = sort_manager.route(algorithm, settings.EXTERNAL_SORT_MEMORY // BYTES_PER_ITEM, trace=False)
+        if algorithm in QUADRATIC_CASES and engine is sort_manager.get(algorithm):
+            engine = sort_manager.get("introsort")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    sorter = ExternalSort(engine, settings.EXTERNAL_SORT_MEMORY, settings.EXTERNAL_SORT_TMPDIR,
+                          input_format=input_format)
+    try:
+        async for chunk in http_request.stream():
+            await run_in_threadpool(sorter.feed_bytes, chunk)
+        path = await run_in_threadpool(sorter.finish, output)
+    except (ValueError, OverflowError) as e:
+        sorter.cleanup()
+        raise HTTPException(status_code=400, detail=f"Invalid input: {e}")
+    except BaseException:
+        sorter.cleanup()
+        raise
+    stats = sorter.stats()
+    headers = {
+        "X-Sort-Items": str(stats["items"]),
+        "X-Sort-Runs": str(stats["runs"]),
+        "X-Sort-Merge-Passes": str(stats["merge_passes"]),
+        "X-Sort-Time": str(stats["time"]),
+    }
+    return FileResponse(
+        path,
+        media_type="text/plain" if output == "text" else "application/octet-stream",
+        filename="sorted.txt" if output == "text" else "sorted.bin",
+        headers=headers,
+        background=BackgroundTask(sorter.cleanup),
+    )
+
+# Sorted collections: stateful sessions for append-and-query workloads (e.g. leaderboards), so an
+# insert costs O(log n + block size) instead of re-posting and re-sorting the whole array.
+# Sessions live in this process only; least recently used ones are evicted past the caps.
+collections = CollectionStore(settings.COLLECTION_MAX_SESSIONS, settings.COLLECTION_MAX_ITEMS)
+
+class ValueRequest(BaseModel):
+    value: int
+
+def unknown_collection(cid: str):
+    return HTTPException(status_code=404, detail=f"Unknown or evicted collection: {cid}")
+
+# Reads go through CollectionStore's locked query methods, since inserts and deletes from other
+# threadpool requests reshape a collection's blocks concurrently.
+@app.post("/collections")
+def create_collection(request: SortRequest):
+    try:
+        cid = collections.create(request.array)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"id": cid, "size": len(request.array)}
+
+@app.get("/collections/stats")
+def collection_stats():
+    return collections.stats()
+
+@app.get("/collections/{cid}")
+def read_collection(cid: str, offset: int = 0, limit: int = 1000):
+    try:
+        return collections.slice(cid, offset, offset + limit)
+    except KeyError:
+        raise unknown_collection(cid)
+
+@app.delete("/collections/{cid}")
+def drop_collection(cid: str):
+    try:
+        collections.drop(cid)
+    except KeyError:
+        raise unknown_collection(cid)
+    return {"id": cid, "dropped": True}
+
+@app.post("/collections/{cid}/insert")
+def insert_value(cid: str, request: ValueRequest):
+    return bulk_insert(cid, SortRequest(array=[request.value]))
+
+@app.post("/collections/{cid}/bulk")
+def bulk_insert(cid: str, request: SortRequest):
+    try:
+        return collections.insert(cid, request.array)
+    except KeyError:
+        raise unknown_collection(cid)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.delete("/collections/{cid}/values/{value}")
+def delete_value(cid: str, value: int):
+    try:
+        return collections.remove(cid, value)
+    except KeyError:
+        raise unknown_collection(cid)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.get("/collections/{cid}/rank")
+def rank_value(cid: str, value: int):
+    try:
+        return collections.rank(cid, value)
+    except KeyError:
+        raise unknown_collection(cid)
+
+@app.get("/collections/{cid}/range")
+def range_values(cid: str, lo: int, hi: int, limit: int = 1000):
+    try:
+        return collections.range(cid, lo, hi, limit)
+    except KeyError:
+        raise unknown_collection(cid)
+
+# Streaming sort endpoint: steps are produced lazily and sent as NDJSON lines or SSE events,
+# ending with a "done" step that carries the sorted array and metrics.
+STREAM_BATCH_SIZE = 64
+
+def encode_step(step, media):
+    line = json.dumps(step, separators=(",", ":"))
+    return f"data: {line}\n\n" if media == "sse" else f"{line}\n"
+
+def record_stream(algorithm, size, steps):
+    # Streamed sorts bypass SortingAlgorithm.sort() and its hooks, so they are recorded here: from
+    # the metrics of the 'done' step, or as an error when the sort raises ValueError.
+    count = 0
+    try:
+        for step in steps:
+            if step["type"] == "done":
+                record_sort(algorithm, size, True, step, {"compute": step["metrics"]["time"]}, steps=count)
+            else:
+                count += 1
+            yield step
+    except ValueError:
+        record_sort(algorithm, size, True, None, {})
+        raise
+
+def encode_steps(steps, media):
+    # Serializes steps in small batches; StreamingResponse pulls the next batch only after the
+    # previous one was sent, so a slow client throttles the sort instead of growing a buffer.
+    # The status line is already sent, so a late ValueError ends the stream with an "error" step.
+    batch = []
+    try:
+        for step in steps:
+            batch.append(encode_step(step, media))
+            if len(batch) >= STREAM_BATCH_SIZE or step["type"] == "done":
+                yield "".join(batch)
+                batch = []
+    except ValueError as e:
+        batch.append(encode_step({"type": "error", "error": str(e)}, media))
+    if batch:
+        yield "".join(batch)
+
+@app.post("/sort/{algorithm}/stream", openapi_extra={"requestBody": SORT_REQUEST_BODY})
+async def stream_sort(
+    algorithm: str,
+    http_request: Request,
+    trace_format: Literal["delta", "full"] = "delta",
+    media: Literal["ndjson", "sse"] = "ndjson",
+    options: TraceOptions = Depends(trace_options),
+):
+    if algorithm not in sort_manager.algorithms:
+        return JSONResponse(status_code=400, content={"error": f"Unknown algorithm: {algorithm}"})
+    array = await read_request_array(http_request)
+    steps = record_stream(algorithm, len(array), sort_manager.stream(algorithm, array, trace_format, options))
+    # The first step is pulled before responding, so input checks that run before any step
+    # (e.g. counting sort's key range) still return 400 instead of breaking the stream.
+    try:
+        first = await run_in_threadpool(next, steps)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    steps = chain([first], steps)
+    media_type = "text/event-stream" if media == "sse" else "application/x-ndjson"
+    return StreamingResponse(encode_steps(steps, media), media_type=media_type)
 
 # AI-suggestion endpoint
 app.include_router(ai_router)
@@ -0,0 +1,141 @@
+# sort_pool.py
+import asyncio
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from algorithms.parallel_merge_sort import worker_context
+from algorithms.sort_manager import SortManager
+from algorithms.trace import TraceOptions
+
+# Algorithms whose cost grows with n^2 on typical input.
+QUADRATIC_ALGORITHMS = {"bubble", "insertion"}
+# Distributions on which a two-way quicksort variant degrades to O(n^2): a last-element pivot on
+# presorted input, and two-way partitions on many equal keys or the organ-pipe shape.
+QUADRATIC_CASES = {
+    "quick": {"sorted", "reversed", "few_unique", "organ_pipe"},
+    "quick_median3": {"few_unique", "organ_pipe"},
+    "quick_random": {"few_unique"},
+    "quick_3way": {"organ_pipe"},
+}
+# Algorithms that fan out to their own worker processes when untraced.
+PARALLEL_ALGORITHMS = {"merge_parallel"}
+# Building trace steps costs roughly this many times more than the bare comparisons.
+TRACE_COST_FACTOR = 20
+# Estimated element operations above which a job leaves the event loop's process.
+HEAVY_JOB_COST = 2_000_000
+# Extra seconds the parent waits beyond the job timeout before giving up on a worker.
+TIMEOUT_GRACE = 1.0
+
+_worker_manager: Optional[SortManager] = None
+
+
+def runs_in_process(algorithm: str, trace: bool) -> bool:
+    # True for jobs that map() runs on a thread of this process when it is given `local`.
+    return algorithm in PARALLEL_ALGORITHMS and not trace
+
+
+def estimated_cost(algorithm: str, size: int, trace: bool = True) -> int:
+    # Rough element-operation count used to decide whether a job is worth a process hop.
+    cost = size * size if algorithm in QUADRATIC_ALGORITHMS else size * max(size.bit_length(), 1)
+    return cost * TRACE_COST_FACTOR if trace else cost
+
+
+def is_heavy(algorithm: str, size: int, trace: bool = True) -> bool:
+    # True when the job should run in the process pool rather than in the web worker.
+    if algorithm in PARALLEL_ALGORITHMS and not trace:
+        return False
+    return estimated_cost(algorithm, size, trace) >= HEAVY_JOB_COST
+
+
+def _raise_timeout(signum, frame):
+    # SIGALRM handler that aborts the sort running in this worker process.
+    raise TimeoutError("Sort job exceeded its time limit")
+
+
+def run_job(algorithm: str, array: List[int], trace_format: str = "delta", trace: bool = True,
+            timeout: Optional[float] = None, options: Optional[TraceOptions] = None) -> Dict:
+    # Runs one sort inside a worker process. Where SIGALRM timers exist (POSIX) the job is
+    # interrupted at its deadline so a runaway sort frees the worker instead of finishing unseen.
+    global _worker_manager
+    if _worker_manager is None:
+        _worker_manager = SortManager()
+    use_alarm = bool(timeout) and hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return _worker_manager.sort(algorithm, array, trace_format, trace, options)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class SortPool:
+    # This class defines the structure and logic for SortPool
+    """
+    Sort Pool: A ProcessPoolExecutor for CPU-bound sort jobs, so a large bubble sort runs on
+    another core instead of holding the GIL of the process serving requests. Jobs get a timeout;
+    a job that is cancelled (timeout or client disconnect) before it starts is dropped from the
+    queue, and a running job is interrupted by the worker-side alarm in run_job().
+    """
+    def __init__(self, workers: Optional[int] = None, timeout: float = 30.0):
+        # Initializes the class instance with necessary attributes.
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        # Starts the worker processes.
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=worker_context())
+
+    def shutdown(self):
+        # Stops the worker processes, dropping queued jobs.
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    async def submit(self, algorithm: str, array: List[int], trace_format: str = "delta",
+                     trace: bool = True, timeout: Optional[float] = None,
+                     options: Optional[TraceOptions] = None) -> Dict:
+        # Runs a sort job in the pool and waits for it, raising TimeoutError past the deadline.
+        if self.executor is None:
+            raise RuntimeError("SortPool is not started")
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be positive")
+        timeout = timeout or self.timeout
+        future = self.executor.submit(run_job, algorithm, array, trace_format, trace, timeout, options)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout + TIMEOUT_GRACE)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise TimeoutError("Sort job exceeded its time limit")
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+    async def map(self, jobs: List[Dict], timeout: Optional[float] = None,
+                  local: Optional[Callable[..., Dict]] = None) -> List[Dict]:
+        # Runs many jobs concurrently and returns one result or error per job, in job order; any
+        # failure of a single job (a timeout, bad input, a crashed worker) becomes that job's error.
+        # Untraced PARALLEL_ALGORITHMS jobs start their own worker processes, so with `local` (called
+        # like SortManager.sort) they run on a thread of this process instead of nesting pools.
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be positive")
+
+        async def run(job):
+            trace_format, trace = job.get("trace_format", "delta"), job.get("trace", False)
+            try:
+                if local is not None and runs_in_process(job["algorithm"], trace):
+                    return await asyncio.wait_for(
+                        asyncio.to_thread(local, job["algorithm"], job["array"], trace_format, trace),
+                        timeout or self.timeout)
+                return await self.submit(job["algorithm"], job["array"], trace_format, trace, timeout)
+            except asyncio.TimeoutError:
+                return {"error": "Sort job exceeded its time limit"}
+            except Exception as e:
+                return {"error": str(e) or type(e).__name__}
+
+        return list(await asyncio.gather(*(run(job) for job in jobs)))
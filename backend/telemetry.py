@@ -0,0 +1,277 @@
+# telemetry.py
+import cProfile
+import io
+import pstats
+import random
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from algorithms.base import SortHook, SortingAlgorithm
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+STEP_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    # Escapes a label value for the text exposition format.
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], le: Optional[str] = None) -> str:
+    # Renders a label set such as {route="/sort/{algorithm}",le="0.5"}.
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    # This class defines the structure and logic for Counter
+    """
+    Counter: A monotonically increasing value per label set.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        # Initializes the class instance with necessary attributes.
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        # Adds amount to the series for labels.
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        # Exposition lines of every series.
+        with self.lock:
+            return [f"{self.name}{_labels(self.label_names, key)} {value:g}" for key, value in sorted(self.values.items())]
+
+
+class Histogram:
+    # This class defines the structure and logic for Histogram
+    """
+    Histogram: Cumulative bucket counts plus sum and count per label set, as in the Prometheus client.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Iterable[float], labels: Iterable[str] = ()):
+        # Initializes the class instance with necessary attributes.
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.label_names = tuple(labels)
+        self.series: Dict[Tuple[str, ...], list] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        # Records one observation for labels.
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self.lock:
+            series = self.series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> List[str]:
+        # Bucket, sum and count lines of every series.
+        lines = []
+        with self.lock:
+            for key, (counts, total, count) in sorted(self.series.items()):
+                for bound, bucket in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_labels(self.label_names, key, f'{bound:g}')} {bucket}")
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, '+Inf')} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {total:g}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class Registry:
+    # This class defines the structure and logic for Registry
+    """
+    Registry: The metrics exposed on /metrics, rendered in the Prometheus text format.
+    """
+    def __init__(self):
+        # Initializes the class instance with necessary attributes.
+        self.metrics = []
+
+    def register(self, metric):
+        # Adds a metric and returns it.
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        # Text exposition of every metric.
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Request latency until the last body byte was sent.",
+    LATENCY_BUCKETS, ("method", "route", "status")))
+http_request_size = registry.register(Histogram(
+    "http_request_size_bytes", "Request body size.", SIZE_BUCKETS, ("route",)))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Response body size.", SIZE_BUCKETS, ("route",)))
+sort_phase_duration = registry.register(Histogram(
+    "sort_phase_seconds", "Time per sort phase: compute, trace (building steps) or serialize.",
+    LATENCY_BUCKETS, ("algorithm", "phase")))
+sort_trace_steps = registry.register(Histogram(
+    "sort_trace_steps", "Steps recorded per traced sort.", STEP_BUCKETS, ("algorithm",)))
+sort_runs = registry.register(Counter(
+    "sort_runs_total", "Sorts run, by outcome.", ("algorithm", "trace", "outcome")))
+sort_elements = registry.register(Counter(
+    "sort_elements_total", "Elements sorted; divide its rate by sort_compute_seconds_total's for throughput.",
+    ("algorithm",)))
+sort_compute_seconds = registry.register(Counter(
+    "sort_compute_seconds_total", "Seconds spent in the sorting algorithms.", ("algorithm",)))
+
+
+def algorithm_name(algorithm: SortingAlgorithm) -> str:
+    # Registered name of an algorithm, or its class name outside SortManager.
+    return algorithm.name or type(algorithm).__name__
+
+
+def record_sort(name: str, size: int, trace: bool, result: Optional[Dict], phases: Dict,
+                steps: Optional[int] = None):
+    # Records one sort's outcome, phase timings, throughput and step count. `steps` stands in for
+    # len(result["steps"]) when the steps were streamed rather than collected.
+    sort_runs.inc(algorithm=name, trace=str(trace).lower(), outcome="ok" if result is not None else "error")
+    for phase, seconds in phases.items():
+        sort_phase_duration.observe(seconds, algorithm=name, phase=phase)
+    if result is None:
+        return
+    sort_elements.inc(size, algorithm=name)
+    sort_compute_seconds.inc(phases.get("compute", 0.0), algorithm=name)
+    if trace:
+        sort_trace_steps.observe(len(result["steps"]) if steps is None else steps, algorithm=name)
+
+
+class MetricsHook(SortHook):
+    # This class defines the structure and logic for MetricsHook
+    """
+    Metrics Hook: Feeds every in-process sort into the registry.
+    """
+    def after_sort(self, algorithm, size, trace, result, phases):
+        # Records the finished sort.
+        record_sort(algorithm_name(algorithm), size, trace, result, phases)
+
+
+class ProfilingHook(SortHook):
+    # This class defines the structure and logic for ProfilingHook
+    """
+    Profiling Hook: Runs cProfile around a sample of sorts and accumulates the stats. Every sort is
+    profiled with probability `sample_rate`, and arm(n) forces the next n sorts to be profiled on
+    demand. The profiler lives in a thread-local, since before_sort() and after_sort() run on the
+    thread doing the sort.
+    """
+    def __init__(self, sample_rate: float = 0.0):
+        # Initializes the class instance with necessary attributes.
+        self.sample_rate = sample_rate
+        self.armed = 0
+        self.profiled = 0
+        self.stats: Optional[pstats.Stats] = None
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def arm(self, sorts: int):
+        # Profiles the next `sorts` sorts regardless of the sample rate.
+        with self.lock:
+            self.armed = sorts
+
+    def before_sort(self, algorithm, size, trace):
+        # Starts a profiler when this sort is sampled.
+        with self.lock:
+            sampled = self.armed > 0 or (self.sample_rate and random.random() < self.sample_rate)
+            if self.armed > 0:
+                self.armed -= 1
+        if sampled:
+            self.local.profiler = cProfile.Profile()
+            self.local.profiler.enable()
+
+    def after_sort(self, algorithm, size, trace, result, phases):
+        # Stops the profiler and merges its stats.
+        profiler = getattr(self.local, "profiler", None)
+        if profiler is None:
+            return
+        profiler.disable()
+        self.local.profiler = None
+        with self.lock:
+            self.profiled += 1
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler, stream=io.StringIO())
+            else:
+                self.stats.add(profiler)
+
+    def report(self, limit: int = 30, sort_by: str = "cumulative") -> str:
+        # The top functions of the accumulated profile as pstats text.
+        with self.lock:
+            if self.stats is None:
+                return "No sorts profiled yet.\n"
+            out = io.StringIO()
+            self.stats.stream = out
+            out.write(f"{self.profiled} sorts profiled\n")
+            self.stats.sort_stats(sort_by).print_stats(limit)
+            return out.getvalue()
+
+    def reset(self):
+        # Drops the accumulated profile.
+        with self.lock:
+            self.stats = None
+            self.profiled = 0
+
+
+class MetricsMiddleware:
+    # This class defines the structure and logic for MetricsMiddleware
+    """
+    Metrics Middleware: Plain ASGI middleware that times each HTTP request until its last body
+    chunk (so streaming responses are covered) and counts request and response bytes. Requests are
+    labelled by route template, not raw path, to keep the label set bounded.
+    """
+    def __init__(self, app):
+        # Initializes the class instance with necessary attributes.
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # Wraps receive/send to measure the request, then records it once the response is done.
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        sizes = {"request": 0, "response": 0, "status": 500}
+
+        async def counting_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                sizes["request"] += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            if message["type"] == "http.response.start":
+                sizes["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                sizes["response"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_request_duration.observe(time.perf_counter() - start, method=scope["method"],
+                                          route=route, status=sizes["status"])
+            http_request_size.observe(sizes["request"], route=route)
+            http_response_size.observe(sizes["response"], route=route)
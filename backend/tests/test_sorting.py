@@ -1,6 +1,35 @@
 
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import unittest
 from algorithms.sort_manager import SortManager
+from algorithms.trace import reconstruct, TraceOptions
+from algorithms.sorting import merge_sort
+from algorithms.quick_sort import QuickSort
+from algorithms.numpy_sort import HAS_NUMPY
+from algorithms.result_cache import ResultCache, cache_key
+from sort_pool import SortPool, is_heavy, run_job
+import benchmark
+from algorithms.base import SortHook, SortingAlgorithm
+from telemetry import Counter, Histogram, Registry, ProfilingHook, sort_runs
+from algorithms.parallel_merge_sort import ParallelMergeSort, merge_many
+import tracemalloc
+from array import array
+from algorithms.external_sort import ExternalSort
+from algorithms.sorted_collection import SortedCollection, CollectionStore
+from algorithms.recommender import analyze, classify, calibrate
+from ai_client import SuggestionClient
+from ingest import parse_array, INT64_MEDIA_TYPE
+from fastapi.testclient import TestClient
+import main
+from algorithms.trace_codec import encode_binary, decode_binary, encode_json, negotiate, BINARY_MEDIA_TYPE, JSON_MEDIA_TYPE
 
 class TestSortingAlgorithms(unittest.TestCase):
     def setUp(self):
@@ -46,5 +75,960 @@ class TestSortingAlgorithms(unittest.TestCase):
         with self.assertRaises(TypeError):
             self.manager.sort("bubble", ["a", 2, 3])
 
+class TestTraceFormats(unittest.TestCase):
+    def setUp(self):
+        self.manager = SortManager()
+
+    def test_delta_steps_omit_full_snapshots(self):
+        result = self.manager.sort("bubble", [4, 2, 1, 3])
+        swap = next(s for s in result['steps'] if s['type'] == 'swap')
+        self.assertNotIn('array', swap)
+        self.assertEqual(swap['changes'], [[0, 2], [1, 4]])
+
+    def test_full_format_keeps_snapshots(self):
+        result = self.manager.sort("insertion", [4, 2, 1, 3], trace_format='full')
+        for step in result['steps']:
+            if step['type'] in ('swap', 'insert'):
+                self.assertIn('array', step)
+                self.assertNotIn('changes', step)
+
+    def test_reconstruct_matches_full_snapshots(self):
+        data = [9, 3, 7, 1, 8, 2, 6, 4, 5, 0] * 30
+        for algo in ("bubble", "insertion", "quick"):
+            full = self.manager.sort(algo, list(data), trace_format='full')['steps']
+            delta = self.manager.sort(algo, list(data))['steps']
+            self.assertTrue(any('array' in s for s in delta))
+            for index, step in enumerate(full):
+                if 'array' in step:
+                    self.assertEqual(reconstruct(data, delta, index), step['array'])
+            self.assertEqual(reconstruct(data, delta), sorted(data))
+
+    def test_unknown_trace_format(self):
+        with self.assertRaises(ValueError):
+            self.manager.sort("bubble", [2, 1], trace_format='xml')
+
+class TestStepStreaming(unittest.TestCase):
+    def setUp(self):
+        self.manager = SortManager()
+
+    def test_stream_matches_sort(self):
+        for algo in self.manager.algorithms:
+            steps = list(self.manager.stream(algo, [5, 1, 4, 2, 3]))
+            result = self.manager.sort(algo, [5, 1, 4, 2, 3])
+            done = steps.pop()
+            self.assertEqual(done['type'], 'done')
+            self.assertEqual(done['sorted'], [1, 2, 3, 4, 5])
+            self.assertEqual(steps, result['steps'])
+            self.assertEqual(done['metrics']['comparisons'], result['metrics']['comparisons'])
+
+    def test_stream_is_lazy(self):
+        steps = self.manager.stream("bubble", list(range(2000, 0, -1)))
+        first = next(steps)
+        self.assertEqual(first['type'], 'compare')
+        self.assertEqual(first['indices'], [0, 1])
+
+class TestTraceSampling(unittest.TestCase):
+    def setUp(self):
+        self.manager = SortManager(traces=ResultCache())
+        rng = random.Random(3)
+        self.data = [rng.randint(0, 40) for _ in range(80)]
+
+    def pages(self, algo, options, trace_format='delta', limit=7):
+        # Collects every window of a sampled trace by following next_offset.
+        pages, offset = [], 0
+        while offset is not None:
+            window = TraceOptions(options.sampling, options.every, options.max_steps, offset, limit)
+            result = self.manager.sort(algo, list(self.data), trace_format, options=window)
+            pages.append(result['steps'])
+            offset = result['trace']['next_offset']
+        return pages
+
+    def test_sampled_traces_reconstruct_the_result(self):
+        strategies = [TraceOptions('every_kth', 5), TraceOptions('swaps_only'), TraceOptions('merge_level'),
+                      TraceOptions(max_steps=12), TraceOptions('every_kth', 3, max_steps=5)]
+        for algo in self.manager.recommendable():
+            for trace_format in ("delta", "full"):
+                for options in strategies:
+                    result = self.manager.sort(algo, list(self.data), trace_format, options=options)
+                    self.assertEqual(result['sorted'], sorted(self.data))
+                    if result['steps']:
+                        self.assertEqual(reconstruct(self.data, result['steps']), result['sorted'], (algo, options.as_dict()))
+
+    def test_max_steps_bounds_the_trace(self):
+        full = self.manager.sort("bubble", list(self.data))['steps']
+        result = self.manager.sort("bubble", list(self.data), options=TraceOptions(max_steps=50))
+        self.assertLessEqual(len(result['steps']), 50)
+        self.assertGreater(len(result['steps']), 25)
+        self.assertGreater(result['trace']['stride'], 1)
+        self.assertEqual(result['trace']['total'], len(result['steps']))
+        self.assertLess(len(result['steps']), len(full))
+
+    def test_strategies_filter_step_types(self):
+        swaps = self.manager.sort("quick", list(self.data), options=TraceOptions('swaps_only'))['steps']
+        self.assertTrue(swaps and all('changes' in step for step in swaps))
+        merges = self.manager.sort("merge", list(self.data), options=TraceOptions('merge_level'))['steps']
+        self.assertTrue(merges and all(step['type'] == 'merge' for step in merges))
+
+    def test_windows_concatenate_to_the_sampled_trace(self):
+        for options in (TraceOptions('swaps_only'), TraceOptions(max_steps=40)):
+            for trace_format in ("delta", "full"):
+                whole = self.manager.sort("insertion", list(self.data), trace_format, options=options)['steps']
+                pages = self.pages("insertion", options, trace_format)
+                self.assertEqual(sum(len(page) for page in pages), len(whole))
+                offset = 0
+                for page in pages[1:]:
+                    offset += 7
+                    # A later window starts from a snapshot, so it reconstructs on its own.
+                    self.assertIn('array', page[0])
+                    self.assertEqual(reconstruct(self.data, page), reconstruct(self.data, whole, offset + len(page) - 1))
+
+    def test_window_summary(self):
+        options = TraceOptions('swaps_only', offset=3, limit=4)
+        first = self.manager.sort("bubble", list(self.data), options=options)
+        self.assertEqual(len(first['steps']), 4)
+        self.assertEqual(first['trace']['returned'], 4)
+        self.assertTrue(first['trace']['has_more'])
+        self.assertEqual(first['trace']['next_offset'], 7)
+        last = self.manager.sort("bubble", [2, 1], options=TraceOptions('swaps_only', offset=0, limit=4))
+        self.assertEqual(last['trace'], {**last['trace'], 'total': 1, 'returned': 1, 'has_more': False, 'next_offset': None})
+        exact = self.manager.sort("bubble", [2, 1], options=TraceOptions(limit=2))
+        self.assertEqual(exact['trace'], {**exact['trace'], 'total': 2, 'returned': 2, 'has_more': False, 'next_offset': None})
+
+    def test_stream_uses_the_same_sampling(self):
+        options = TraceOptions('every_kth', 4, limit=10)
+        steps = list(self.manager.stream("heap", list(self.data), options=options))
+        done = steps.pop()
+        self.assertEqual(steps, self.manager.sort("heap", list(self.data), options=options)['steps'])
+        self.assertEqual(done['sorted'], sorted(self.data))
+        self.assertEqual(done['trace']['next_offset'], 10)
+
+    def test_invalid_options(self):
+        for kwargs in ({'sampling': 'random'}, {'sampling': 'every_kth', 'every': 0}, {'max_steps': 0}, {'offset': -1}):
+            with self.assertRaises(ValueError):
+                TraceOptions(**kwargs)
+
+    def test_trace_store(self):
+        trace_id = self.manager.input_key("quick", [3, 1, 2], "full")
+        self.assertTrue(self.manager.remember_trace(trace_id, "quick", [3, 1, 2], "full"))
+        self.assertEqual(self.manager.recall_trace(trace_id), ("quick", array("q", [3, 1, 2]), "full"))
+        with self.assertRaises(KeyError):
+            self.manager.recall_trace("missing")
+
+    def test_trace_store_reports_inputs_over_budget(self):
+        manager = SortManager(traces=ResultCache(max_bytes=64))
+        trace_id = manager.input_key("quick", list(range(100)))
+        self.assertFalse(manager.remember_trace(trace_id, "quick", list(range(100))))
+        with self.assertRaises(KeyError):
+            manager.recall_trace(trace_id)
+
+    def test_binary_tail_carries_the_summary(self):
+        result = self.manager.sort("tim", list(self.data), options=TraceOptions(max_steps=20, limit=5))
+        decoded = decode_binary(encode_binary(result))
+        self.assertEqual(decoded['trace'], result['trace'])
+        self.assertEqual(decoded['metrics'], result['metrics'])
+
+class TestMetricsOnly(unittest.TestCase):
+    def setUp(self):
+        self.manager = SortManager()
+
+    def test_untraced_counts_match_traced(self):
+        data = [7, 3, 9, 3, 1, 8, 2, 2, 6, 0, 5, 4]
+        for algo in self.manager.algorithms:
+            if algo.startswith("numpy_"):
+                continue
+            traced = self.manager.sort(algo, list(data))
+            untraced = self.manager.sort(algo, list(data), trace=False)
+            self.assertEqual(untraced['steps'], [])
+            self.assertEqual(untraced['sorted'], sorted(data))
+            self.assertEqual(untraced['metrics']['comparisons'], traced['metrics']['comparisons'])
+            self.assertEqual(untraced['metrics']['swaps'], traced['metrics']['swaps'])
+
+    def test_untraced_invalid_data(self):
+        with self.assertRaises(TypeError):
+            self.manager.sort("quick", ["a", 2, 3], trace=False)
+
+class TestMergeSort(unittest.TestCase):
+    def setUp(self):
+        self.manager = SortManager()
+
+    def test_bottom_up_variant(self):
+        data = [9, 4, 7, 1, 1, 8, 3, 0, 6]
+        result = self.manager.sort("merge_bottom_up", list(data))
+        self.assertEqual(result['sorted'], sorted(data))
+        self.assertEqual(reconstruct(data, result['steps']), sorted(data))
+
+    def test_merge_steps_reference_ranges(self):
+        result = self.manager.sort("merge", [4, 2, 1, 3])
+        merges = [s for s in result['steps'] if s['type'] == 'merge']
+        self.assertEqual([s['range'] for s in merges], [[0, 2], [2, 4], [0, 4]])
+        self.assertEqual(merges[-1]['changes'], [[0, 1], [1, 2], [2, 3], [3, 4]])
+
+    def test_large_input(self):
+        data = list(range(20000, 0, -1))
+        result = self.manager.sort("merge", data, trace=False)
+        self.assertEqual(result['sorted'], sorted(data))
+        self.assertEqual(data[0], 20000)
+
+    def test_legacy_merge_sort(self):
+        result = merge_sort([5, 3, 3, 1])
+        self.assertEqual(result['sorted'], [1, 3, 3, 5])
+        self.assertEqual(result['metrics']['comparisons'], self.manager.sort("merge", [5, 3, 3, 1])['metrics']['comparisons'])
+
+class TestQuickSortVariants(unittest.TestCase):
+    def setUp(self):
+        self.manager = SortManager()
+
+    def test_variants_sort_adversarial_inputs(self):
+        inputs = [list(range(3000)), list(range(3000, 0, -1)), [7] * 3000]
+        for algo in ("quick", "quick_median3", "quick_random", "quick_3way", "introsort"):
+            for data in inputs:
+                if algo in ("quick", "quick_median3", "quick_random") and data == inputs[2]:
+                    continue
+                result = self.manager.sort(algo, list(data), trace=False)
+                self.assertEqual(result['sorted'], sorted(data))
+
+    def test_three_way_duplicates_are_linear(self):
+        result = self.manager.sort("quick_3way", [7] * 1000, trace=False)
+        self.assertEqual(result['metrics']['comparisons'], 1000 + 2)
+
+    def test_introsort_heapsort_fallback(self):
+        data = [9, 3, 7, 1, 8, 2, 6, 4, 5, 0] * 20
+        algorithm = QuickSort(introsort=True)
+        algorithm.depth_limit = lambda n: 1
+        result = algorithm.sort(list(data))
+        self.assertEqual(result['sorted'], sorted(data))
+        self.assertEqual(reconstruct(data, result['steps']), sorted(data))
+        self.assertEqual({s['type'] for s in result['steps']}, {'compare', 'swap'})
+        self.assertEqual(result['metrics']['comparisons'], algorithm.sort(list(data), trace=False)['metrics']['comparisons'])
+
+class TestLinearAndAdaptiveSorts(unittest.TestCase):
+    def setUp(self):
+        self.manager = SortManager()
+
+    def test_new_algorithms(self):
+        data = [5, -3, 9, 0, 9, 2, -7, 4, 1, 1]
+        for algo in ("heap", "tim", "radix", "counting"):
+            result = self.manager.sort(algo, list(data))
+            self.assertEqual(result['sorted'], sorted(data))
+            self.assertEqual(reconstruct(data, result['steps']), sorted(data))
+            self.assertEqual(set(result['metrics']), {'comparisons', 'swaps', 'time'})
+
+    def test_empty_and_single(self):
+        for algo in ("heap", "tim", "radix", "counting"):
+            self.assertEqual(self.manager.sort(algo, [])['sorted'], [])
+            self.assertEqual(self.manager.sort(algo, [42])['sorted'], [42])
+
+    def test_tim_sort_is_adaptive(self):
+        data = list(range(5000))
+        data[100], data[4000] = data[4000], data[100]
+        result = self.manager.get("tim").sort(list(data), trace=False)
+        self.assertEqual(result['sorted'], sorted(data))
+        self.assertLess(result['metrics']['comparisons'], 2 * len(data))
+
+    def test_radix_large_keys(self):
+        data = [2 ** 40, -2 ** 35, 17, 0, 2 ** 40 - 1]
+        self.assertEqual(self.manager.sort("radix", list(data), trace=False)['sorted'], sorted(data))
+
+    def test_counting_sort_rejects_wide_range(self):
+        with self.assertRaises(ValueError):
+            self.manager.sort("counting", [0, 10 ** 9])
+
+    def test_invalid_data(self):
+        for algo in ("heap", "tim", "radix", "counting"):
+            with self.assertRaises(TypeError):
+                self.manager.sort(algo, ["a", 2, 3])
+
+class TestNumpyEngine(unittest.TestCase):
+    def setUp(self):
+        self.manager = SortManager(numpy_threshold=100)
+
+    def test_numpy_engines_sort(self):
+        data = [(i * 7919) % 1000 - 500 for i in range(300)]
+        for algo in ("numpy_quick", "numpy_merge", "numpy_heap", "numpy_radix", "numpy_counting"):
+            result = self.manager.sort(algo, list(data), trace=False)
+            self.assertEqual(result['sorted'], sorted(data))
+
+    def test_traced_numpy_engine_uses_fallback_steps(self):
+        result = self.manager.sort("numpy_quick", [3, 1, 2])
+        self.assertEqual(result['sorted'], [1, 2, 3])
+        self.assertTrue(result['steps'])
+
+    def test_small_or_traced_requests_are_not_routed(self):
+        self.assertIs(self.manager.route("quick", 10, trace=False), self.manager.algorithms["quick"])
+        self.assertIs(self.manager.route("quick", 10000, trace=True), self.manager.algorithms["quick"])
+        self.assertIs(self.manager.route("bubble", 10000, trace=False), self.manager.algorithms["bubble"])
+
+    @unittest.skipUnless(HAS_NUMPY, "NumPy not installed")
+    def test_large_untraced_requests_use_numpy(self):
+        data = list(range(1000, 0, -1)) + [2 ** 62, -2 ** 62]
+        for algo in ("quick", "merge", "heap", "radix", "counting"):
+            result = self.manager.sort(algo, list(data), trace=False)
+            self.assertEqual(result['sorted'], sorted(data))
+            self.assertEqual(result['metrics']['engine'], 'numpy')
+
+    def test_out_of_range_values_fall_back(self):
+        data = [2 ** 70, 5, -1] * 50
+        result = self.manager.sort("numpy_radix", list(data), trace=False)
+        self.assertEqual(result['sorted'], sorted(data))
+        self.assertNotIn('engine', result['metrics'])
+
+class TestSortPool(unittest.TestCase):
+    def test_is_heavy(self):
+        self.assertTrue(is_heavy("bubble", 5000, trace=False))
+        self.assertFalse(is_heavy("quick", 1000, trace=False))
+
+    def test_run_job_timeout(self):
+        with self.assertRaises(TimeoutError):
+            run_job("bubble", list(range(5000, 0, -1)), trace=False, timeout=0.05)
+
+    def test_map_keeps_order_and_reports_errors(self):
+        async def run():
+            pool = SortPool(workers=2, timeout=5)
+            pool.start()
+            try:
+                return await pool.map([
+                    {"algorithm": "merge", "array": [3, 1, 2]},
+                    {"algorithm": "counting", "array": [0, 10 ** 9]},
+                    {"algorithm": "quick", "array": [5, 4]},
+                ])
+            finally:
+                pool.shutdown()
+
+        results = asyncio.run(run())
+        self.assertEqual(results[0]['sorted'], [1, 2, 3])
+        self.assertIn('error', results[1])
+        self.assertEqual(results[2]['sorted'], [4, 5])
+
+    def test_map_reports_any_worker_failure_per_job(self):
+        async def run():
+            pool = SortPool(workers=1, timeout=5)
+            pool.start()
+            try:
+                return await pool.map([
+                    {"algorithm": "merge", "array": [3, 1, 2]},
+                    {"algorithm": "merge", "array": [[1], 2]},
+                ])
+            finally:
+                pool.shutdown()
+
+        results = asyncio.run(run())
+        self.assertEqual(results[0]['sorted'], [1, 2, 3])
+        self.assertIn('error', results[1])
+
+    def test_parallel_jobs_run_locally(self):
+        calls = []
+
+        def local(algorithm, array, trace_format, trace):
+            calls.append(algorithm)
+            return SortManager().sort(algorithm, array, trace_format, trace)
+
+        async def run():
+            pool = SortPool(workers=1, timeout=5)
+            pool.start()
+            try:
+                return await pool.map([
+                    {"algorithm": "merge_parallel", "array": [3, 1, 2]},
+                    {"algorithm": "merge", "array": [2, 1]},
+                ], local=local)
+            finally:
+                pool.shutdown()
+
+        results = asyncio.run(run())
+        self.assertEqual(calls, ["merge_parallel"])
+        self.assertEqual([r['sorted'] for r in results], [[1, 2, 3], [1, 2]])
+
+    def test_map_rejects_non_positive_timeout(self):
+        pool = SortPool(workers=1)
+        with self.assertRaises(ValueError):
+            asyncio.run(pool.map([{"algorithm": "merge", "array": [1]}], timeout=-1))
+
+class TestResultCache(unittest.TestCase):
+    def test_sort_json_hits_cache(self):
+        manager = SortManager(cache=ResultCache())
+        first = manager.sort_json("quick", [3, 1, 2])
+        second = manager.sort_json("quick", [3, 1, 2])
+        self.assertIs(first, second)
+        self.assertEqual(json.loads(first)['sorted'], [1, 2, 3])
+        self.assertEqual(manager.cache.stats()['hits'], 1)
+        self.assertEqual(manager.cache.stats()['misses'], 1)
+
+    def test_key_depends_on_algorithm_options_and_values(self):
+        base = cache_key("quick", {'trace': True}, [1, 2, 3])
+        self.assertNotEqual(base, cache_key("merge", {'trace': True}, [1, 2, 3]))
+        self.assertNotEqual(base, cache_key("quick", {'trace': False}, [1, 2, 3]))
+        self.assertNotEqual(base, cache_key("quick", {'trace': True}, [1, 2, 4]))
+        self.assertEqual(base, cache_key("quick", {'trace': True}, [1, 2, 3]))
+
+    def test_lru_eviction_by_bytes(self):
+        cache = ResultCache(max_bytes=10)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+        cache.get("a")
+        cache.put("c", b"12345")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), b"12345")
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_disk_spill(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(max_bytes=10, path=os.path.join(tmp, "cache.sqlite"))
+            cache.put("a", b"12345")
+            cache.put("b", b"123456789")
+            self.assertEqual(cache.stats()['disk_entries'], 1)
+            self.assertEqual(cache.get("a"), b"12345")
+            cache.db.close()
+
+class TestBenchmark(unittest.TestCase):
+    def test_distributions(self):
+        rng = random.Random(0)
+        for distribution in benchmark.DISTRIBUTIONS:
+            data = benchmark.make_input(distribution, 50, rng)
+            self.assertEqual(len(data), 50)
+        self.assertEqual(benchmark.make_input("organ_pipe", 6, rng), [0, 1, 2, 3, 2, 1])
+
+    def test_run_and_compare(self):
+        report = benchmark.run(["quick", "bubble"], ("random", "sorted"), (30,), trials=2, warmup=0)
+        self.assertEqual(len(report['results']), 4)
+        entry = report['results'][0]
+        for field in ('time_ns', 'throughput_per_s', 'peak_bytes', 'steps', 'trace_json_bytes', 'trace_binary_bytes'):
+            self.assertIn(field, entry)
+        self.assertEqual(benchmark.compare(report, report, 1.0), [])
+
+    def test_skips_quadratic_cases(self):
+        report = benchmark.run(["quick", "introsort"], ("sorted", "random"), (40,), trials=1, warmup=0,
+                               quadratic_max_size=30, memory_max_size=0)
+        skipped = {(e['algorithm'], e['distribution']) for e in report['results'] if 'skipped' in e}
+        self.assertEqual(skipped, {("quick", "sorted")})
+        self.assertTrue(all('peak_bytes' not in e for e in report['results']))
+
+class TestBinaryTrace(unittest.TestCase):
+    def setUp(self):
+        self.manager = SortManager()
+
+    def test_round_trip(self):
+        data = [5, -3, 9, 0, 9, 2, -7, 4, 1, 1] * 20
+        for algo in ("bubble", "merge", "quick_3way", "tim", "radix"):
+            for trace_format in ("delta", "full"):
+                result = self.manager.sort(algo, list(data), trace_format=trace_format)
+                decoded = decode_binary(encode_binary(result))
+                expected = [{k: v for k, v in s.items() if k != 'explanation'} for s in result['steps']]
+                self.assertEqual(decoded['steps'], expected)
+                self.assertEqual(decoded['sorted'], result['sorted'])
+                self.assertEqual(decoded['metrics'], result['metrics'])
+
+    def test_binary_is_smaller_than_json(self):
+        result = self.manager.sort("bubble", list(range(100, 0, -1)))
+        self.assertLess(len(encode_binary(result)) * 2, len(encode_json(result)))
+
+    def test_negotiate(self):
+        self.assertEqual(negotiate(BINARY_MEDIA_TYPE), BINARY_MEDIA_TYPE)
+        self.assertEqual(negotiate("text/html, application/x-sort-trace;q=0.9"), BINARY_MEDIA_TYPE)
+        self.assertEqual(negotiate("*/*"), JSON_MEDIA_TYPE)
+        self.assertEqual(negotiate(""), JSON_MEDIA_TYPE)
+
+    def test_negotiate_honours_q_values(self):
+        self.assertEqual(negotiate("application/json;q=1, application/x-sort-trace;q=0.1"), JSON_MEDIA_TYPE)
+        self.assertEqual(negotiate("application/json;q=0.2, application/x-sort-trace;q=0.9"), BINARY_MEDIA_TYPE)
+        self.assertEqual(negotiate("application/x-sort-trace;q=0"), JSON_MEDIA_TYPE)
+
+    def test_unknown_step_type_is_a_server_error(self):
+        result = {'steps': [{'type': 'rotate'}], 'sorted': [], 'metrics': {}}
+        with self.assertRaises(RuntimeError):
+            encode_binary(result)
+
+    def test_values_outside_int64(self):
+        with self.assertRaises(OverflowError):
+            encode_binary(self.manager.sort("quick", [2 ** 70, 1]))
+
+class TestIngest(unittest.TestCase):
+    def test_json_body(self):
+        values, rest = parse_array(b'{"array": [3, -1, 2], "mode": "fast"}')
+        self.assertEqual(values, array('q', [3, -1, 2]))
+        self.assertEqual(rest, {"mode": "fast"})
+
+    def test_int64_body(self):
+        data = array('q', [5, -2 ** 63, 2 ** 63 - 1])
+        if sys.byteorder == 'big':
+            data.byteswap()
+        values, rest = parse_array(data.tobytes(), INT64_MEDIA_TYPE + "; charset=binary")
+        self.assertEqual(values.tolist(), [5, -2 ** 63, 2 ** 63 - 1])
+        self.assertEqual(rest, {})
+
+    def test_rejects_invalid_input(self):
+        for body in (b'{"array": [1, 2.5]}', b'{"array": [1, "2"]}', b'{"array": [9223372036854775808]}',
+                     b'{"array": 5}', b'[1, 2]', b'{"array": [1,'):
+            with self.assertRaises(ValueError):
+                parse_array(body)
+        with self.assertRaises(ValueError):
+            parse_array(b'\x00' * 9, INT64_MEDIA_TYPE)
+
+    def test_error_messages(self):
+        for body in (b'{"array": [9223372036854775808]}', b'{"array": [18446744073709551616]}',
+                     b'{"array": [-99999999999999999999999]}'):
+            with self.assertRaisesRegex(ValueError, "64-bit"):
+                parse_array(body)
+        with self.assertRaisesRegex(ValueError, "got 1.0"):
+            parse_array(b'{"array": [1, 1.0]}')
+
+    def test_floats_when_allowed(self):
+        values, _ = parse_array(b'{"array": [1, 2.5]}', allow_float=True)
+        self.assertEqual(values.typecode, 'd')
+        self.assertEqual(parse_array(b'{"array": [1, 2]}', allow_float=True)[0].typecode, 'q')
+
+    def test_engines_take_the_buffer(self):
+        manager = SortManager(numpy_threshold=1)
+        data = [7, -3, 7, 0, 12, -8, 5] * 3
+        buffer = array('q', data)
+        for algo in ("quick", "merge", "radix", "counting", "bubble"):
+            for trace in (True, False):
+                result = manager.sort(algo, buffer, trace=trace)
+                self.assertIsInstance(result['sorted'], list)
+                self.assertEqual(result['sorted'], sorted(data))
+        self.assertEqual(list(buffer), data)
+        self.assertEqual(cache_key("quick", {}, buffer), cache_key("quick", {}, data))
+
+    def test_parallel_sort_of_buffer(self):
+        engine = ParallelMergeSort(workers=2, min_partition=50)
+        try:
+            data = list(range(300, 0, -1))
+            result, metrics = engine.sort_untraced(array('q', data))
+        finally:
+            engine.shutdown()
+        self.assertEqual(result, sorted(data))
+        self.assertEqual(metrics['workers'], 2)
+
+class TestRecommender(unittest.TestCase):
+    def setUp(self):
+        self.manager = SortManager()
+
+    def test_analyze_measures(self):
+        features = analyze([1, 2, 3, 3, 2, 1])
+        self.assertEqual(features['runs'], 2)
+        self.assertEqual(features['descents'], 2)
+        self.assertEqual(features['duplicate_ratio'], 0.5)
+        self.assertEqual((features['min'], features['max']), (1, 3))
+        self.assertEqual(classify(analyze(list(range(100, 0, -1)))), 'reversed')
+        self.assertEqual(analyze(list(range(5000, 0, -1)))['inversion_ratio'], 1.0)
+
+    def test_recommendations_follow_structure(self):
+        rng = random.Random(3)
+        self.assertEqual(self.manager.recommend([3, 1, 2])['algorithm'], 'insertion')
+        self.assertEqual(self.manager.recommend(list(range(2000)))['algorithm'], 'tim')
+        self.assertEqual(self.manager.recommend([rng.randrange(4) for _ in range(500)])['algorithm'], 'counting')
+        floats = self.manager.recommend([rng.random() for _ in range(500)])
+        self.assertEqual(floats['algorithm'], 'introsort')
+        self.assertNotIn(floats['algorithm'], ('radix', 'counting'))
+
+    def test_recommendation_sorts_correctly(self):
+        rng = random.Random(5)
+        data = [rng.randint(-10 ** 9, 10 ** 9) for _ in range(3000)]
+        algo = self.manager.recommend(data)['algorithm']
+        self.assertEqual(self.manager.sort(algo, list(data), trace=False)['sorted'], sorted(data))
+
+    def test_calibration_overrides_heuristics(self):
+        report = benchmark.run(["merge", "tim", "numpy_merge"], ["random"], [200], trials=1, warmup=0)
+        report["results"] = [dict(e, time_ns={"median": 1 if e["algorithm"] == "merge" else 2}) for e in report["results"]]
+        self.assertEqual(calibrate(report, ["merge", "tim"]), {"random": [[200, "merge"]]})
+        self.manager.calibrate(report)
+        rng = random.Random(6)
+        data = [rng.random() for _ in range(300)]
+        recommendation = self.manager.recommend(data)
+        self.assertEqual((recommendation['algorithm'], recommendation['source']), ('merge', 'calibrated'))
+
+class TestSortedCollection(unittest.TestCase):
+    def test_matches_sorted_list(self):
+        rng = random.Random(7)
+        collection = SortedCollection([rng.randrange(100) for _ in range(50)], load=4)
+        expected = sorted(collection)
+        for _ in range(500):
+            op = rng.random()
+            if op < 0.5:
+                value = rng.randrange(100)
+                collection.add(value)
+                expected.append(value)
+                expected.sort()
+            elif op < 0.6:
+                values = [rng.randrange(100) for _ in range(rng.randrange(1, 40))]
+                collection.update(values)
+                expected = sorted(expected + values)
+            elif expected:
+                value = rng.choice(expected)
+                collection.remove(value)
+                expected.remove(value)
+            value = rng.randrange(100)
+            self.assertEqual(collection.rank(value), sum(1 for v in expected if v < value))
+            self.assertEqual(collection.count(value), expected.count(value))
+        self.assertEqual(list(collection), expected)
+        self.assertEqual(len(collection), len(expected))
+        self.assertEqual(collection.slice(10, 30), expected[10:30])
+        self.assertEqual(collection.range(20, 60), [v for v in expected if 20 <= v <= 60])
+        self.assertEqual(collection.range(20, 60, limit=3), [v for v in expected if 20 <= v <= 60][:3])
+        self.assertTrue(all(len(block) <= 8 for block in collection.blocks))
+
+    def test_remove_missing_value(self):
+        with self.assertRaises(ValueError):
+            SortedCollection([1, 3]).remove(2)
+
+    def test_store_evicts_least_recently_used(self):
+        store = CollectionStore(max_sessions=2, max_items=10)
+        first, second = store.create([1]), store.create([2])
+        store.get(first)
+        third = store.create([3])
+        self.assertNotIn(second, store.sessions)
+        self.assertEqual(set(store.sessions), {first, third})
+        store.insert(third, list(range(9)))
+        self.assertEqual(list(store.sessions), [third])
+        with self.assertRaises(ValueError):
+            store.insert(third, list(range(2)))
+        self.assertEqual(store.stats()['evictions'], 2)
+
+    def test_store_queries(self):
+        store = CollectionStore()
+        cid = store.create([5, 1, 3, 3])
+        self.assertEqual(store.insert(cid, [4]), {'id': cid, 'size': 5})
+        self.assertEqual(store.slice(cid, 1, 3)['values'], [3, 3])
+        self.assertEqual(store.rank(cid, 3), {'value': 3, 'rank': 1, 'count': 2, 'size': 5})
+        self.assertEqual(store.range(cid, 2, 4)['values'], [3, 3, 4])
+        self.assertEqual(store.remove(cid, 3)['size'], 4)
+        with self.assertRaises(KeyError):
+            store.rank("missing", 1)
+
+    def test_store_reads_during_concurrent_writes(self):
+        store = CollectionStore(load=4)
+        cid = store.create(list(range(100)))
+        errors = []
+
+        def write():
+            rng = random.Random(9)
+            for _ in range(2000):
+                value = rng.randrange(200)
+                store.insert(cid, [value])
+                store.remove(cid, value)
+
+        def read():
+            try:
+                for _ in range(2000):
+                    summary = store.slice(cid, 0, 1000)
+                    self.assertEqual(len(summary['values']), summary['size'])
+                    store.rank(cid, 50)
+                    store.range(cid, 10, 90)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write), threading.Thread(target=read)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+class TestExternalSort(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(8)
+        self.data = [rng.randint(-10 ** 12, 10 ** 12) for _ in range(20000)]
+        self.manager = SortManager()
+
+    def run_sort(self, sorter, body, output, chunk_size=999):
+        try:
+            for i in range(0, len(body), chunk_size):
+                sorter.feed_bytes(body[i:i + chunk_size])
+            with open(sorter.finish(output), 'rb') as f:
+                return f.read()
+        finally:
+            sorter.cleanup()
+            self.assertFalse(os.path.exists(sorter.dir))
+
+    def test_text_runs_with_multiple_merge_passes(self):
+        sorter = ExternalSort(self.manager.get("introsort"), memory_budget=64 * 500, fan_in=4)
+        body = ", ".join(map(str, self.data)).encode()
+        out = self.run_sort(sorter, body, 'text')
+        self.assertEqual([int(v) for v in out.split()], sorted(self.data))
+        self.assertEqual(sorter.stats()['runs'], 40)
+        self.assertEqual(sorter.stats()['merge_passes'], 3)
+
+    def test_int64_round_trip(self):
+        sorter = ExternalSort(self.manager.get("merge"), memory_budget=64 * 3000, input_format='int64')
+        out = array('q')
+        out.frombytes(self.run_sort(sorter, array('q', self.data).tobytes(), 'int64'))
+        self.assertEqual(out.tolist(), sorted(self.data))
+
+    def test_rejects_bad_input(self):
+        with self.assertRaises(ValueError):
+            self.run_sort(ExternalSort(self.manager.get("merge")), b"1 2 x", 'text')
+        with self.assertRaises(ValueError):
+            self.run_sort(ExternalSort(self.manager.get("merge"), input_format='int64'), b"123", 'int64')
+        with self.assertRaises(OverflowError):
+            self.run_sort(ExternalSort(self.manager.get("merge")), str(2 ** 70).encode(), 'text')
+
+    def test_rejects_unbounded_token(self):
+        sorter = ExternalSort(self.manager.get("merge"))
+        try:
+            with self.assertRaises(ValueError):
+                for _ in range(100):
+                    sorter.feed_bytes(b"1" * 16)
+        finally:
+            sorter.cleanup()
+
+    def test_memory_stays_within_budget(self):
+        budget = 64 * 2000
+        body = " ".join(map(str, self.data)).encode()
+        sorter = ExternalSort(self.manager.get("merge"), memory_budget=budget)
+        tracemalloc.start()
+        try:
+            for i in range(0, len(body), 4096):
+                sorter.feed_bytes(body[i:i + 4096])
+            sorter.finish('text')
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            sorter.cleanup()
+        self.assertLess(peak, 2 * budget)
+
+class TestParallelMergeSort(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.algorithm = ParallelMergeSort(workers=3, min_partition=100)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.algorithm.shutdown()
+
+    def test_sorts_across_workers(self):
+        rng = random.Random(9)
+        for data in ([rng.randint(-10 ** 9, 10 ** 9) for _ in range(5000)], [rng.randrange(3) for _ in range(3000)]):
+            result = self.algorithm.sort(list(data), trace=False)
+            self.assertEqual(result['sorted'], sorted(data))
+            metrics = result['metrics']
+            self.assertEqual(metrics['workers'], 3)
+            self.assertEqual([task['phase'] for task in metrics['per_worker']], ['sort'] * 3 + ['merge'] * 3)
+            self.assertEqual(sum(task['items'] for task in metrics['per_worker']), 2 * len(data))
+            self.assertEqual(metrics['comparisons'], sum(task['comparisons'] for task in metrics['per_worker']))
+            self.assertGreater(metrics['cpu_time'], 0)
+
+    def test_small_and_wide_inputs_run_sequentially(self):
+        self.assertNotIn('workers', self.algorithm.sort([3, 1, 2], trace=False)['metrics'])
+        wide = [2 ** 70, -1] * 200
+        self.assertEqual(self.algorithm.sort(list(wide), trace=False)['sorted'], sorted(wide))
+
+    def test_merge_many_counts_comparisons(self):
+        merged, comparisons = merge_many([[1, 4], [2, 3], [], [0]])
+        self.assertEqual(merged, [0, 1, 2, 3, 4])
+        self.assertGreater(comparisons, 0)
+
+class RecordingHook(SortHook):
+    def __init__(self):
+        self.calls = []
+
+    def before_sort(self, algorithm, size, trace):
+        self.calls.append(('before', algorithm.name, size, trace))
+
+    def after_sort(self, algorithm, size, trace, result, phases):
+        self.calls.append(('after', algorithm.name, result is not None, sorted(phases)))
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.manager = SortManager()
+        self.hook = RecordingHook()
+        SortingAlgorithm.add_hook(self.hook)
+
+    def tearDown(self):
+        SortingAlgorithm.remove_hook(self.hook)
+
+    def test_hooks_see_phases(self):
+        self.manager.sort("quick", [3, 1, 2])
+        self.manager.sort("merge", [3, 1, 2], trace=False)
+        self.assertEqual(self.hook.calls, [
+            ('before', 'quick', 3, True), ('after', 'quick', True, ['compute', 'trace']),
+            ('before', 'merge', 3, False), ('after', 'merge', True, ['compute']),
+        ])
+
+    def test_after_sort_runs_on_failure(self):
+        with self.assertRaises(ValueError):
+            self.manager.sort("counting", [0, 10 ** 9], trace=False)
+        self.assertEqual(self.hook.calls[-1], ('after', 'counting', False, []))
+
+    def test_prometheus_text(self):
+        registry = Registry()
+        latency = registry.register(Histogram("latency_seconds", "Latency.", (0.1, 1.0), ("route",)))
+        runs = registry.register(Counter("runs_total", "Runs.", ("algorithm",)))
+        latency.observe(0.05, route="/a")
+        latency.observe(0.5, route="/a")
+        runs.inc(algorithm='say "hi"')
+        text = registry.render()
+        self.assertIn('# TYPE latency_seconds histogram', text)
+        self.assertIn('latency_seconds_bucket{route="/a",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{route="/a",le="+Inf"} 2', text)
+        self.assertIn('latency_seconds_count{route="/a"} 2', text)
+        self.assertIn('runs_total{algorithm="say \\"hi\\""} 1', text)
+
+    def test_profiling_on_demand(self):
+        profiler = ProfilingHook()
+        SortingAlgorithm.add_hook(profiler)
+        try:
+            self.manager.sort("heap", [3, 1, 2], trace=False)
+            self.assertIn("No sorts profiled", profiler.report())
+            profiler.arm(1)
+            self.manager.sort("heap", [3, 1, 2], trace=False)
+            self.manager.sort("heap", [3, 1, 2], trace=False)
+            self.assertEqual(profiler.profiled, 1)
+            self.assertIn("sort_untraced", profiler.report())
+        finally:
+            SortingAlgorithm.remove_hook(profiler)
+
+class StubOpenRouter(BaseHTTPRequestHandler):
+    # Stand-in for the OpenRouter chat endpoint: streams three SSE chunks slowly, or fails on demand.
+    requests = 0
+    status = 200
+
+    def do_POST(self):
+        type(self).requests += 1
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(self.status)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        if self.status != 200:
+            self.wfile.write(b"quota exceeded")
+            return
+        for word in ("Use", " merge", " sort"):
+            self.wfile.write(f"data: {word}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(0.05)
+
+    def log_message(self, *args):
+        pass
+
+class TestSuggestionClient(unittest.TestCase):
+    def setUp(self):
+        StubOpenRouter.requests = 0
+        StubOpenRouter.status = 200
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubOpenRouter)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/chat/completions"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def collect(self, client, array):
+        async def read():
+            return "".join([chunk async for chunk in client.suggest(array, "prompt", "key")])
+        return read()
+
+    def run_client(self, scenario, **options):
+        async def run():
+            client = SuggestionClient(url=self.url, **options)
+            await client.start()
+            try:
+                return await scenario(client)
+            finally:
+                await client.close()
+        return asyncio.run(run())
+
+    def test_cached_suggestion_is_replayed(self):
+        async def scenario(client):
+            first = await self.collect(client, [3, 1, 2])
+            second = await self.collect(client, [3, 1, 2])
+            return first, second, client.cache_hits
+
+        first, second, hits = self.run_client(scenario)
+        self.assertEqual(first, "data: Use\n\ndata:  merge\n\ndata:  sort\n\n")
+        self.assertEqual(second, first)
+        self.assertEqual(hits, 1)
+        self.assertEqual(StubOpenRouter.requests, 1)
+
+    def test_concurrent_identical_requests_share_one_stream(self):
+        async def scenario(client):
+            return await asyncio.gather(*(self.collect(client, [5, 4]) for _ in range(4)))
+
+        results = self.run_client(scenario)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(StubOpenRouter.requests, 1)
+
+    def test_expired_entries_are_refetched(self):
+        async def scenario(client):
+            await self.collect(client, [1, 2])
+            await self.collect(client, [1, 2])
+
+        self.run_client(scenario, cache_ttl=0)
+        self.assertEqual(StubOpenRouter.requests, 2)
+
+    def test_errors_are_streamed_and_not_cached(self):
+        StubOpenRouter.status = 429
+
+        async def scenario(client):
+            first = await self.collect(client, [1])
+            await self.collect(client, [1])
+            return first
+
+        first = self.run_client(scenario)
+        self.assertTrue(first.startswith("[Error]: OpenRouter API returned status 429"))
+        self.assertEqual(StubOpenRouter.requests, 2)
+
+    def test_total_timeout(self):
+        async def scenario(client):
+            return await self.collect(client, [9, 8])
+
+        text = self.run_client(scenario, total_timeout=0.05)
+        self.assertIn("did not finish within", text)
+
+class TestEndpoints(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.client_context = TestClient(main.app)
+        cls.client = cls.client_context.__enter__()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client_context.__exit__(None, None, None)
+
+    def test_stream_rejects_invalid_input_before_streaming(self):
+        response = self.client.post("/sort/counting/stream", json={"array": [0, 10 ** 12]})
+        self.assertEqual(response.status_code, 400)
+        lines = self.client.post("/sort/counting/stream", json={"array": [3, 1, 2]}).text.splitlines()
+        self.assertEqual(json.loads(lines[-1])["sorted"], [1, 2, 3])
+
+    def test_sort_file_runs_degrading_quicksorts_with_introsort(self):
+        # Last-pivot quick is O(n^2) on sorted runs, so the runs are sorted by introsort instead.
+        introsort = main.sort_manager.get("introsort")
+        calls = []
+        introsort.sort_untraced = lambda arr: calls.append(len(arr)) or QuickSort.sort_untraced(introsort, arr)
+        threshold = main.sort_manager.numpy_threshold
+        main.sort_manager.numpy_threshold = float("inf")
+        try:
+            response = self.client.post("/sort-file/quick", content=b"3 1 2 5 4")
+        finally:
+            main.sort_manager.numpy_threshold = threshold
+            del introsort.sort_untraced
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.split(), [b"1", b"2", b"3", b"4", b"5"])
+        self.assertEqual(calls, [5])
+    def test_trace_pages_by_id(self):
+        # Later windows are sorted from a copy of the stored input, which is neither mutated nor stored again.
+        data = [5, 4, 3, 2, 1]
+        full = self.client.post("/sort/bubble?sampling=swaps_only", json={"array": data}).json()["steps"]
+        first = self.client.post("/sort/bubble?sampling=swaps_only&limit=2", json={"array": data}).json()
+        trace_id, steps, pages = first["trace"]["id"], first["steps"], 1
+        offset = first["trace"]["next_offset"]
+        while offset is not None:
+            page = self.client.get(f"/traces/{trace_id}?sampling=swaps_only&offset={offset}&limit=2").json()
+            self.assertEqual(page["trace"]["id"], trace_id)
+            self.assertEqual(page["sorted"], sorted(data))
+            steps.extend(page["steps"])
+            offset = page["trace"]["next_offset"]
+            pages += 1
+        self.assertGreaterEqual(pages, 3)
+        self.assertEqual(len(steps), len(full))
+        self.assertEqual(reconstruct(data, steps), sorted(data))
+        self.assertEqual(main.sort_manager.recall_trace(trace_id), ("bubble", array("q", data), "delta"))
+
+    def test_stream_and_batch_sorts_are_recorded(self):
+        runs = sort_runs.values
+        stream_key, batch_key = ("heap", "true", "ok"), ("merge", "false", "ok")
+        before = runs.get(stream_key, 0), runs.get(batch_key, 0)
+        self.client.post("/sort/heap/stream", json={"array": [3, 1, 2]}).text
+        self.client.post("/sort/batch", json={"arrays": [[2, 1], [4, 3]], "algorithms": ["merge"]})
+        self.assertEqual((runs.get(stream_key, 0), runs.get(batch_key, 0)), (before[0] + 1, before[1] + 2))
+
+
 if __name__ == "__main__":
     unittest.main()
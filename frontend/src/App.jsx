@@ -104,7 +104,8 @@ function App() {
     try {
       const { data } = await axios.post(
         `${API_BASE}/sort/${algorithm}`,
-        { array: parsedArray }
+        { array: parsedArray },
+        { params: { trace_format: 'full' } }
       );
       setSteps(data.steps);
       setMetrics(data.metrics);